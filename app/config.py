@@ -11,10 +11,95 @@ QDRANT_PORT = int(os.getenv("QDRANT_PORT", 6333))
 LLM_MODEL = os.getenv("LLM_MODEL", "llama3.1:8b")
 LLM_TEMPERATURE = float(os.getenv("LLM_TEMPERATURE", 0))
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", 0))
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_MAX_LENGTH = int(os.getenv("EMBEDDING_MAX_LENGTH", 256))
+EMBEDDING_PARITY_MIN_COSINE = float(os.getenv("EMBEDDING_PARITY_MIN_COSINE", 0.99))
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "models/all-MiniLM-L6-v2-onnx")
+ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "false").lower() == "true"
 EMAIL_HOST = os.getenv("EMAIL_HOST", "smtp.gmail.com")
 EMAIL_PORT = int(os.getenv("EMAIL_PORT", 587))
 EMAIL_USERNAME = os.getenv("EMAIL_USERNAME")
 EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
 EMAIL_FROM = os.getenv("EMAIL_FROM")
 EMAIL_RECIPIENT = os.getenv("EMAIL_RECIPIENT")
-EMAIL_SENDER_NAME = os.getenv("EMAIL_SENDER_NAME", "SupportAI")    
+EMAIL_SENDER_NAME = os.getenv("EMAIL_SENDER_NAME", "SupportAI")
+EMAIL_STARTTLS = os.getenv("EMAIL_STARTTLS", "true").lower() == "true"
+EMAIL_TIMEOUT = float(os.getenv("EMAIL_TIMEOUT", 10))
+EMAIL_IDLE_TIMEOUT = float(os.getenv("EMAIL_IDLE_TIMEOUT", 60))
+NOTIFY_DEDUP_WINDOW = float(os.getenv("NOTIFY_DEDUP_WINDOW", 3600))
+NOTIFY_DIGEST_INTERVAL = float(os.getenv("NOTIFY_DIGEST_INTERVAL", 60))
+NOTIFY_MAX_RETRIES = int(os.getenv("NOTIFY_MAX_RETRIES", 5))
+NOTIFY_RETRY_BACKOFF = float(os.getenv("NOTIFY_RETRY_BACKOFF", 2))
+NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", 1000))
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", 0))
+EMBEDDING_PROCESSES = int(os.getenv("EMBEDDING_PROCESSES", 1))
+EMBEDDING_QUEUE_SIZE = int(os.getenv("EMBEDDING_QUEUE_SIZE", 4))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "data/embedding_cache.sqlite3")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 500000))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 4))
+ASK_BATCH_MAX_QUESTIONS = int(os.getenv("ASK_BATCH_MAX_QUESTIONS", 500))
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "auto")
+ANALYSIS_SINGLE_MAX_CHARS = int(os.getenv("ANALYSIS_SINGLE_MAX_CHARS", 12000))
+ANALYSIS_SECTION_CHARS = int(os.getenv("ANALYSIS_SECTION_CHARS", 6000))
+ANALYSIS_MAX_SECTIONS = int(os.getenv("ANALYSIS_MAX_SECTIONS", 32))
+ANALYSIS_MAX_CONCURRENCY = int(os.getenv("ANALYSIS_MAX_CONCURRENCY", 4))
+ANALYSIS_RETRIES = int(os.getenv("ANALYSIS_RETRIES", 2))
+RERANKER = os.getenv("RERANKER", "embedding")
+RERANK_MMR_LAMBDA = float(os.getenv("RERANK_MMR_LAMBDA", 0.7))
+CROSS_ENCODER_MODEL = os.getenv("CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+REWRITE_FAST_PATH = os.getenv("REWRITE_FAST_PATH", "true").lower() == "true"
+REWRITE_CACHE_SIZE = int(os.getenv("REWRITE_CACHE_SIZE", 2048))
+REWRITE_CACHE_TTL = float(os.getenv("REWRITE_CACHE_TTL", 3600))
+REWRITE_HISTORY_MESSAGES = int(os.getenv("REWRITE_HISTORY_MESSAGES", 6))
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.92))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", 86400))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 1000))
+SEMANTIC_CACHE_VERSIONS_PATH = os.getenv("SEMANTIC_CACHE_VERSIONS_PATH", "data/collection_versions.sqlite3")
+SITE_ANALYSIS_DB_PATH = os.getenv("SITE_ANALYSIS_DB_PATH", "data/site_analysis.sqlite3")
+FAQ_ENABLED = os.getenv("FAQ_ENABLED", "true").lower() == "true"
+FAQ_MATCH_THRESHOLD = float(os.getenv("FAQ_MATCH_THRESHOLD", 0.88))
+FAQ_ABOUT_MATCH_THRESHOLD = float(os.getenv("FAQ_ABOUT_MATCH_THRESHOLD", 0.93))
+FAQ_PRECOMPUTE_ANSWERS = os.getenv("FAQ_PRECOMPUTE_ANSWERS", "false").lower() == "true"
+FAQ_PRECOMPUTE_LIMIT = int(os.getenv("FAQ_PRECOMPUTE_LIMIT", 10))
+INGEST_JOBS_DB_PATH = os.getenv("INGEST_JOBS_DB_PATH", "data/ingest_jobs.sqlite3")
+INGEST_UPLOAD_DIR = os.getenv("INGEST_UPLOAD_DIR", "data/uploads")
+INGEST_MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", 2))
+INGEST_MAX_PENDING = int(os.getenv("INGEST_MAX_PENDING", 100))
+INGEST_JOB_LEASE_SECONDS = float(os.getenv("INGEST_JOB_LEASE_SECONDS", 60))
+PDF_LOADER_PROCESSES = int(os.getenv("PDF_LOADER_PROCESSES", 1))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", 32))
+QDRANT_UPSERT_WORKERS = int(os.getenv("QDRANT_UPSERT_WORKERS", 2))
+BULK_EXTRACT_PROCESSES = int(os.getenv("BULK_EXTRACT_PROCESSES", os.cpu_count() or 1))
+BULK_SCRAPE_THREADS = int(os.getenv("BULK_SCRAPE_THREADS", 4))
+CRAWL_PAGE_LIMIT = int(os.getenv("CRAWL_PAGE_LIMIT", 5))
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", 4))
+CRAWL_STATE_PATH = os.getenv("CRAWL_STATE_PATH", "data/crawl_state.sqlite3")
+WEB_CHUNK_SIZE = int(os.getenv("WEB_CHUNK_SIZE", 800))
+WEB_CHUNK_OVERLAP = int(os.getenv("WEB_CHUNK_OVERLAP", 100))
+PDF_CHUNK_SIZE = int(os.getenv("PDF_CHUNK_SIZE", 800))
+PDF_CHUNK_OVERLAP = int(os.getenv("PDF_CHUNK_OVERLAP", 100))
+CHUNK_DEDUP = os.getenv("CHUNK_DEDUP", "true").lower() == "true"
+CHUNK_DEDUP_THRESHOLD = float(os.getenv("CHUNK_DEDUP_THRESHOLD", 0.9))
+BOILERPLATE_MIN_FRACTION = float(os.getenv("BOILERPLATE_MIN_FRACTION", 0.5))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1200))
+CONTEXT_MIN_OVERLAP = int(os.getenv("CONTEXT_MIN_OVERLAP", 20))
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", 600))
+HISTORY_MAX_MESSAGES = int(os.getenv("HISTORY_MAX_MESSAGES", 8))
+CHARS_PER_TOKEN = int(os.getenv("CHARS_PER_TOKEN", 4))
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+HYBRID_PREFETCH_LIMIT = int(os.getenv("HYBRID_PREFETCH_LIMIT", 20))
+BM25_K1 = float(os.getenv("BM25_K1", 1.2))
+BM25_B = float(os.getenv("BM25_B", 0.75))
+BM25_AVG_DOC_LENGTH = float(os.getenv("BM25_AVG_DOC_LENGTH", 120))
+QDRANT_COLLECTION_PROFILE = os.getenv("QDRANT_COLLECTION_PROFILE", "balanced")
+QDRANT_HNSW_M = int(os.getenv("QDRANT_HNSW_M", 0))
+QDRANT_HNSW_EF_CONSTRUCT = int(os.getenv("QDRANT_HNSW_EF_CONSTRUCT", 0))
+QDRANT_SEARCH_EF = int(os.getenv("QDRANT_SEARCH_EF", 0))
+QDRANT_QUANTIZATION_OVERSAMPLING = float(os.getenv("QDRANT_QUANTIZATION_OVERSAMPLING", 0))
+QDRANT_SHARED_COLLECTION = os.getenv("QDRANT_SHARED_COLLECTION", "")
+KNOWN_TENANTS_TTL = float(os.getenv("KNOWN_TENANTS_TTL", 300))
+SERVER_TIMING_HEADERS = os.getenv("SERVER_TIMING_HEADERS", "false").lower() == "true"
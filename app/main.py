@@ -1,14 +1,56 @@
+import asyncio
 import logging
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from app.config import SERVER_TIMING_HEADERS, WARMUP_ON_STARTUP
 from app.routers import api
+from app.services.metrics import server_timing_header, start_request_timings
+from app.services.resources import get_job_runner, get_notifier, stop_warm_up, warm_up
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup_task = None
+    if WARMUP_ON_STARTUP:
+        # Warm up in the background so the worker accepts connections right away;
+        # /api/v1/ready reports 503 until the shared resources are loaded.
+        warmup_task = asyncio.create_task(asyncio.to_thread(warm_up))
+    resumed = get_job_runner().resume()
+    if resumed:
+        logger.info(f"Resumed {resumed} unfinished ingestion jobs")
+    dispatcher = get_notifier()
+    dispatcher.start()
+    yield
+    if warmup_task is not None and not warmup_task.done():
+        # The retry loop runs in a thread, which cancelling the task cannot stop.
+        stop_warm_up()
+        warmup_task.cancel()
+    # Flushes queued notifications; runs in a thread so a slow mail server does
+    # not block the event loop during shutdown.
+    await asyncio.to_thread(dispatcher.stop)
+
+
 app = FastAPI(
     title="SupportAi",
     description="A retrieval-augmented generation system for web/PDF ingestion and question answering.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.include_router(api.router, prefix="/api/v1")
+
+
+if SERVER_TIMING_HEADERS:
+
+    @app.middleware("http")
+    async def server_timing(request: Request, call_next):
+        # /ask/stream sends its headers before the pipeline runs, so streamed
+        # answers carry no Server-Timing header; /metrics still records them.
+        timings = start_request_timings()
+        response = await call_next(request)
+        if timings:
+            response.headers["Server-Timing"] = server_timing_header(timings)
+        return response
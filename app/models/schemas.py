@@ -1,5 +1,5 @@
-from typing import List, Dict, Optional
-from pydantic import BaseModel
+from typing import Any, List, Dict, Literal, Optional
+from pydantic import BaseModel, Field, field_validator
 
 
 class IngestUrlRequest(BaseModel):
@@ -19,7 +19,102 @@ class AskRequest(BaseModel):
     history: Optional[List[Dict[str, str]]] = (
         []
     )  
+    reranker: Optional[Literal["embedding", "cross_encoder", "llm", "none"]] = None
 
 
 class AskResponse(BaseModel):
     answer: str
+
+
+class AskBatchItem(BaseModel):
+    question: str
+    history: Optional[List[Dict[str, str]]] = []
+
+
+class AskBatchRequest(BaseModel):
+    questions: List[AskBatchItem]
+    collection_name: Optional[str] = "pdf_document"
+    reranker: Optional[Literal["embedding", "cross_encoder", "llm", "none"]] = None
+
+
+class AskBatchResponse(BaseModel):
+    answers: List[str]
+
+
+class IngestJobSubmitted(BaseModel):
+    job_id: str
+    status: str
+
+
+class IngestJobStatus(BaseModel):
+    job_id: str
+    kind: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    created_at: float
+    started_at: Optional[float]
+    finished_at: Optional[float]
+    nodes: List[Dict[str, Any]]
+    result: Optional[IngestResponse]
+    error: Optional[str]
+
+
+class BulkIngestItemResult(BaseModel):
+    source: str
+    collection_name: str
+    storage_info: Optional[str]
+    error: Optional[str]
+
+
+class BulkIngestResponse(BaseModel):
+    results: List[BulkIngestItemResult]
+
+
+def _null_to_list(value: Any) -> Any:
+    # ANALYSIS_PROMPT allows null for absent data; treat it as an empty list.
+    return [] if value is None else value
+
+
+class SupportAndFaqInfo(BaseModel):
+    common_questions: List[str] = []
+    contact_methods: List[str] = []
+    troubleshooting_guides: List[str] = []
+
+    @field_validator("*", mode="before")
+    @classmethod
+    def _lists_accept_null(cls, value: Any) -> Any:
+        return _null_to_list(value)
+
+
+class SiteAnalysis(BaseModel):
+    """Schema of the LLM site analysis described in analyzer.ANALYSIS_PROMPT."""
+
+    website_type: Optional[str] = None
+    primary_purpose: Optional[str] = None
+    summary: Optional[str] = None
+    key_topics_or_features: List[str] = []
+    target_audience: List[str] = []
+    important_entities: List[str] = []
+    notable_links_or_actions: List[str] = []
+    support_and_faq_info: SupportAndFaqInfo = SupportAndFaqInfo()
+    business_model_or_intent: Optional[str] = None
+    tech_or_tools_mentioned: List[str] = []
+    potential_user_queries: List[str] = []
+    confidence: Optional[float] = Field(default=None, ge=0, le=1)
+
+    @field_validator(
+        "key_topics_or_features",
+        "target_audience",
+        "important_entities",
+        "notable_links_or_actions",
+        "tech_or_tools_mentioned",
+        "potential_user_queries",
+        mode="before",
+    )
+    @classmethod
+    def _lists_accept_null(cls, value: Any) -> Any:
+        return _null_to_list(value)
+
+    @field_validator("support_and_faq_info", mode="before")
+    @classmethod
+    def _section_accepts_null(cls, value: Any) -> Any:
+        return {} if value is None else value
@@ -1,19 +1,62 @@
+import json
 import uuid
 import tempfile
 import os
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from typing import List
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
-from app.models.schemas import IngestUrlRequest, IngestResponse, AskRequest, AskResponse
-from app.services.ingestion_graph import build_ingestion_graph
-from app.services.qa import answer_question
-from app.services.storage import client
+from app.config import ASK_BATCH_MAX_QUESTIONS, WARMUP_ON_STARTUP, INGEST_UPLOAD_DIR
+from app.models.schemas import (
+    IngestUrlRequest,
+    IngestResponse,
+    IngestJobSubmitted,
+    IngestJobStatus,
+    BulkIngestResponse,
+    AskRequest,
+    AskResponse,
+    AskBatchRequest,
+    AskBatchResponse,
+    SiteAnalysis,
+)
+from app.services.bulk_ingest import ingest_bulk
+from app.services.jobs import JobQueueFull
+from app.services.metrics import register_cache_stats
+from app.services.qa import aanswer_batch, aanswer_question, astream_answer, rewrite_cache_stats
+from app.services.resources import (
+    get_faq_index,
+    get_ingestion_graph,
+    get_job_runner,
+    get_semantic_cache,
+    is_ready,
+)
+from app.services.tenancy import atenant_exists
 
 router = APIRouter()
 
+register_cache_stats(
+    {
+        "rewrite": rewrite_cache_stats,
+        "semantic": lambda: get_semantic_cache().stats(),
+        "faq": lambda: get_faq_index().stats(),
+    }
+)
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+BULK_MAX_ITEMS = 200
+
+
+async def _spool_upload(file: UploadFile, path: str) -> None:
+    with open(path, "wb") as out:
+        while data := await file.read(UPLOAD_CHUNK_SIZE):
+            out.write(data)
+
 
 @router.post("/ingest/url", response_model=IngestResponse)
 def ingest_url_endpoint(body: IngestUrlRequest):
-    graph = build_ingestion_graph()
+    graph = get_ingestion_graph()
     config = {"configurable": {"thread_id": str(uuid.uuid4())}}
     state = graph.invoke({"input_url": body.url, "pdf_path": ""}, config=config)
 
@@ -30,14 +73,19 @@ async def ingest_pdf_endpoint(file: UploadFile = File(...)):
     if not file.filename.endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are allowed")
 
-    with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
-        tmp_file.write(await file.read())
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
         pdf_path = tmp_file.name
 
     try:
-        graph = build_ingestion_graph()
+        await _spool_upload(file, pdf_path)
+        graph = get_ingestion_graph()
         config = {"configurable": {"thread_id": str(uuid.uuid4())}}
-        state = graph.invoke({"input_url": "", "pdf_path": pdf_path}, config=config)
+        # The graph is synchronous; keep it off the event loop.
+        state = await run_in_threadpool(
+            graph.invoke,
+            {"input_url": "", "pdf_path": pdf_path, "pdf_name": file.filename},
+            config=config,
+        )
 
         return IngestResponse(
             collection_name=state.get("collection_name"),
@@ -49,14 +97,173 @@ async def ingest_pdf_endpoint(file: UploadFile = File(...)):
         os.unlink(pdf_path)
 
 
+def _submit_job(kind: str, job_input: dict) -> IngestJobSubmitted:
+    try:
+        job_id = get_job_runner().submit(kind, job_input)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return IngestJobSubmitted(job_id=job_id, status="queued")
+
+
+@router.post("/ingest/jobs/url", response_model=IngestJobSubmitted, status_code=202)
+def submit_url_job_endpoint(body: IngestUrlRequest):
+    return _submit_job("url", {"input_url": body.url})
+
+
+@router.post("/ingest/jobs/pdf", response_model=IngestJobSubmitted, status_code=202)
+async def submit_pdf_job_endpoint(file: UploadFile = File(...)):
+    if not file.filename.endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only PDF files are allowed")
+
+    # The upload must outlive this request, so it is spooled next to the job
+    # database rather than into a temp file; the job deletes it when done.
+    os.makedirs(INGEST_UPLOAD_DIR, exist_ok=True)
+    pdf_path = os.path.join(INGEST_UPLOAD_DIR, f"{uuid.uuid4().hex}.pdf")
+    await _spool_upload(file, pdf_path)
+    try:
+        return _submit_job("pdf", {"pdf_path": pdf_path, "pdf_name": file.filename})
+    except HTTPException:
+        os.unlink(pdf_path)
+        raise
+
+
+@router.get("/ingest/jobs/{job_id}", response_model=IngestJobStatus)
+def ingest_job_status_endpoint(job_id: str):
+    job = get_job_runner().store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found")
+    return IngestJobStatus(
+        job_id=job["id"],
+        kind=job["kind"],
+        status=job["status"],
+        created_at=job["created_at"],
+        started_at=job["started_at"],
+        finished_at=job["finished_at"],
+        nodes=job["nodes"],
+        # Failed jobs stored before results were dropped on failure still carry one.
+        result=job["result"] if job["status"] == "succeeded" else None,
+        error=job["error"],
+    )
+
+
+@router.post("/ingest/bulk", response_model=BulkIngestResponse)
+async def ingest_bulk_endpoint(
+    files: List[UploadFile] = File(default=[]), urls: List[str] = Form(default=[])
+):
+    if not files and not urls:
+        raise HTTPException(status_code=400, detail="Provide at least one file or URL")
+    if len(files) + len(urls) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_ITEMS} items per request")
+    for file in files:
+        if not file.filename.endswith(".pdf"):
+            raise HTTPException(status_code=400, detail=f"Only PDF files are allowed: {file.filename}")
+
+    pdfs = []
+    try:
+        for file in files:
+            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp_file:
+                pdfs.append((file.filename, tmp_file.name))
+            await _spool_upload(file, tmp_file.name)
+
+        results = await run_in_threadpool(ingest_bulk, urls, pdfs)
+        return BulkIngestResponse(results=results)
+    finally:
+        for _, pdf_path in pdfs:
+            os.unlink(pdf_path)
+
+
+@router.get("/collections/{collection_name}/analysis", response_model=SiteAnalysis)
+def collection_analysis_endpoint(collection_name: str):
+    analysis = get_faq_index().store.get(collection_name)
+    if analysis is None:
+        raise HTTPException(
+            status_code=404, detail=f"No site analysis stored for '{collection_name}'"
+        )
+    return analysis
+
+
 @router.post("/ask", response_model=AskResponse)
-def ask_endpoint(body: AskRequest):
-    if not client.collection_exists(body.collection_name):
+async def ask_endpoint(body: AskRequest):
+    if not await atenant_exists(body.collection_name):
         raise HTTPException(
             status_code=404, detail=f"Collection '{body.collection_name}' not found"
         )
 
-    answer = answer_question(
-        body.question, body.history or [], body.collection_name  
+    answer = await aanswer_question(
+        body.question, body.history or [], body.collection_name, body.reranker
     )
     return AskResponse(answer=answer)
+
+
+@router.post("/ask/batch", response_model=AskBatchResponse)
+async def ask_batch_endpoint(body: AskBatchRequest):
+    if not body.questions:
+        raise HTTPException(status_code=400, detail="Provide at least one question")
+    if len(body.questions) > ASK_BATCH_MAX_QUESTIONS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {ASK_BATCH_MAX_QUESTIONS} questions per request"
+        )
+    if not await atenant_exists(body.collection_name):
+        raise HTTPException(
+            status_code=404, detail=f"Collection '{body.collection_name}' not found"
+        )
+
+    answers = await aanswer_batch(
+        [(item.question, item.history or []) for item in body.questions],
+        body.collection_name,
+        body.reranker,
+    )
+    return AskBatchResponse(answers=answers)
+
+
+def _sse_event(data: dict, event: str = "") -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@router.post("/ask/stream")
+async def ask_stream_endpoint(body: AskRequest):
+    if not await atenant_exists(body.collection_name):
+        raise HTTPException(
+            status_code=404, detail=f"Collection '{body.collection_name}' not found"
+        )
+
+    async def events():
+        parts = []
+        try:
+            async for token in astream_answer(
+                body.question, body.history or [], body.collection_name, body.reranker
+            ):
+                parts.append(token)
+                yield _sse_event({"token": token})
+        except Exception as e:
+            yield _sse_event({"error": f"{type(e).__name__}: {e}"}, event="error")
+            return
+        yield _sse_event({"answer": "".join(parts).strip()}, event="done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/ready")
+def ready_endpoint():
+    if WARMUP_ON_STARTUP and not is_ready():
+        raise HTTPException(status_code=503, detail="Warming up")
+    return {"status": "ready"}
+
+
+@router.get("/cache/stats")
+def cache_stats_endpoint():
+    return {
+        "rewrite": rewrite_cache_stats(),
+        "semantic": get_semantic_cache().stats(),
+        "faq": get_faq_index().stats(),
+    }
+
+
+@router.get("/metrics")
+def metrics_endpoint():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
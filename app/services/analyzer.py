@@ -1,7 +1,26 @@
-from typing import Dict, Any
-from langchain_core.messages import HumanMessage, SystemMessage
-from langchain_ollama import ChatOllama
-from app.config import LLM_MODEL, LLM_TEMPERATURE
+import json
+import logging
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple, Type, TypeVar
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from pydantic import BaseModel, ValidationError
+from app.config import (
+    ANALYSIS_MAX_CONCURRENCY,
+    ANALYSIS_MAX_SECTIONS,
+    ANALYSIS_MODE,
+    ANALYSIS_RETRIES,
+    ANALYSIS_SECTION_CHARS,
+    ANALYSIS_SINGLE_MAX_CHARS,
+    LLM_TEMPERATURE,
+)
+from app.models.schemas import SiteAnalysis
+from app.services.metrics import record_llm_usage
+from app.services.resources import get_llm
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
 
 ANALYSIS_PROMPT = """
 You are a web intelligence analyst specialized in extracting descriptive and actionable insights from websites to power support agents. Your goal is to deeply understand the site's structure, content, and user-facing elements to enable accurate question-answering.
@@ -31,19 +50,217 @@ Schema:
 }
 """
 
-llm = ChatOllama(model=LLM_MODEL, temperature=LLM_TEMPERATURE)
+SECTION_NOTE = """
+The content below is section {index} of {total} of a larger website, so describe only what this section shows.
+"""
 
+CONSOLIDATION_PROMPT = """
+You merge partial analyses of one website, each written from a different section of the site, into a single description.
 
-def analyze_content(content: str) -> Dict[str, Any]:
-    if not content:
-        return {"llm_output": "No content to analyze."}
+Return a STRICTLY VALID JSON object with exactly these keys and nothing else:
+{
+  "website_type": "string or null",
+  "primary_purpose": "string or null",
+  "summary": "string (a 2-4 sentence overview of the whole site)",
+  "business_model_or_intent": "string or null"
+}
+"""
+
+# Per-field caps for the merged lists; the prompt asks for 5-10 example queries.
+LIST_LIMITS = {"potential_user_queries": 10}
+DEFAULT_LIST_LIMIT = 20
+SCALAR_FIELDS = ("website_type", "primary_purpose", "summary", "business_model_or_intent")
+# Map-reduce reads only the first ANALYSIS_MAX_SECTIONS sections, so callers need
+# keep no more text than this for the analyzer (None: single mode reads it all).
+MAX_INPUT_CHARS = None if ANALYSIS_MODE == "single" else ANALYSIS_SECTION_CHARS * ANALYSIS_MAX_SECTIONS
+
+
+class _Consolidation(BaseModel):
+    website_type: Optional[str] = None
+    primary_purpose: Optional[str] = None
+    summary: Optional[str] = None
+    business_model_or_intent: Optional[str] = None
+
+
+def _extract_json(text: str) -> str:
+    """The model sometimes wraps the object in a code fence or a sentence; keep the outermost braces."""
+    start, end = text.find("{"), text.rfind("}")
+    return text[start:end + 1] if start != -1 and end > start else text
+
+
+def _invoke_validated(messages: List[BaseMessage], schema: Type[ModelT], purpose: str) -> Tuple[Optional[ModelT], str]:
+    """
+    Ask the LLM for a JSON object matching `schema`. Invalid replies are sent back
+    with the validation error, up to ANALYSIS_RETRIES times. Returns the parsed
+    object, or None, and the last raw reply.
+    """
+    llm = get_llm(LLM_TEMPERATURE)
+    raw = ""
+    for _ in range(ANALYSIS_RETRIES + 1):
+        response = llm.invoke(messages)
+        record_llm_usage(response, purpose)
+        raw = response.content
+        try:
+            return schema.model_validate_json(_extract_json(raw)), raw
+        except ValidationError as e:
+            problems = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'object'}: {err['msg']}" for err in e.errors()[:5])
+            messages = messages + [
+                AIMessage(content=raw),
+                HumanMessage(content=f"That reply is not valid JSON for the schema ({problems}). Return only the corrected JSON object."),
+            ]
+    return None, raw
+
+
+def split_sections(content: str, max_chars: int) -> List[str]:
+    """Group paragraphs into sections of at most max_chars; longer paragraphs are cut."""
+    sections: List[str] = []
+    current: List[str] = []
+    size = 0
+    for paragraph in content.split("\n\n"):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        while len(paragraph) > max_chars:
+            sections.append(paragraph[:max_chars])
+            paragraph = paragraph[max_chars:]
+        if current and size + len(paragraph) + 2 > max_chars:
+            sections.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(paragraph)
+        size += len(paragraph) + 2
+    if current:
+        sections.append("\n\n".join(current))
+    return sections
+
+
+def _analyze_section(section: str, index: int, total: int) -> Optional[SiteAnalysis]:
+    messages = [
+        SystemMessage(content=ANALYSIS_PROMPT + SECTION_NOTE.format(index=index + 1, total=total)),
+        HumanMessage(content=f"Content to analyze:\n\n{section}"),
+    ]
+    try:
+        analysis, _ = _invoke_validated(messages, SiteAnalysis, "analysis")
+    except Exception as e:
+        logger.warning(f"Analysis of section {index + 1}/{total} failed: {e}")
+        return None
+    if analysis is None:
+        logger.warning(f"Analysis of section {index + 1}/{total} returned invalid JSON after retries")
+    return analysis
 
+
+def _merge_lists(values: List[List[str]], limit: int) -> List[str]:
+    seen = set()
+    merged: List[str] = []
+    for items in values:
+        for item in items:
+            key = item.strip().lower()
+            if key and key not in seen:
+                seen.add(key)
+                merged.append(item.strip())
+    return merged[:limit]
+
+
+def _most_common(values: List[Optional[str]]) -> Optional[str]:
+    counts = Counter(value.strip() for value in values if value and value.strip())
+    # Ties keep the earliest section, which is the start page of the crawl.
+    return counts.most_common(1)[0][0] if counts else None
+
+
+def reduce_analyses(partials: List[Tuple[SiteAnalysis, int]]) -> SiteAnalysis:
+    """
+    Deterministically merge (analysis, section length) pairs: lists are deduplicated
+    in section order, short labels take the most common answer, the summary comes
+    from the first section and confidence is weighted by section length.
+    """
+    analyses = [analysis for analysis, _ in partials]
+    merged: Dict[str, Any] = {}
+    for field in SiteAnalysis.model_fields:
+        if field in ("support_and_faq_info", "confidence", "summary"):
+            continue
+        if field in SCALAR_FIELDS:
+            merged[field] = _most_common([getattr(a, field) for a in analyses])
+        else:
+            merged[field] = _merge_lists(
+                [getattr(a, field) for a in analyses], LIST_LIMITS.get(field, DEFAULT_LIST_LIMIT)
+            )
+    merged["summary"] = next((a.summary for a in analyses if a.summary), None)
+    merged["support_and_faq_info"] = {
+        field: _merge_lists([getattr(a.support_and_faq_info, field) for a in analyses], DEFAULT_LIST_LIMIT)
+        for field in type(analyses[0].support_and_faq_info).model_fields
+    }
+    weighted = [(a.confidence, length) for a, length in partials if a.confidence is not None]
+    total = sum(length for _, length in weighted)
+    merged["confidence"] = round(sum(c * length for c, length in weighted) / total, 3) if total else None
+    return SiteAnalysis.model_validate(merged)
+
+
+def _consolidate(merged: SiteAnalysis, partials: List[SiteAnalysis]) -> SiteAnalysis:
+    """One short LLM call rewrites the descriptive fields from all sections' answers."""
+    findings = {
+        "sections": [{field: getattr(p, field) for field in SCALAR_FIELDS} for p in partials],
+        "key_topics_or_features": merged.key_topics_or_features,
+    }
+    messages = [
+        SystemMessage(content=CONSOLIDATION_PROMPT),
+        HumanMessage(content=f"Partial analyses:\n\n{json.dumps(findings, ensure_ascii=False)}"),
+    ]
+    try:
+        consolidated, _ = _invoke_validated(messages, _Consolidation, "analysis_consolidate")
+    except Exception as e:
+        logger.warning(f"Analysis consolidation failed, keeping the merged fields: {e}")
+        return merged
+    if consolidated is None:
+        return merged
+    updates = {field: value for field, value in consolidated.model_dump().items() if value}
+    return merged.model_copy(update=updates)
+
+
+def _result(analysis: SiteAnalysis) -> Dict[str, Any]:
+    return {"llm_output": analysis.model_dump_json(), "analysis": analysis.model_dump()}
+
+
+def _analyze_single(content: str) -> Dict[str, Any]:
     messages = [
         SystemMessage(content=ANALYSIS_PROMPT),
         HumanMessage(content=f"Content to analyze:\n\n{content}"),
     ]
+    analysis, raw = _invoke_validated(messages, SiteAnalysis, "analysis")
+    if analysis is None:
+        # An unparseable reply is still returned as before rather than dropped.
+        return {"llm_output": raw}
+    return _result(analysis)
+
+
+def _analyze_map_reduce(content: str) -> Dict[str, Any]:
+    sections = split_sections(content, ANALYSIS_SECTION_CHARS)
+    if len(sections) > ANALYSIS_MAX_SECTIONS:
+        logger.info(f"Analyzing the first {ANALYSIS_MAX_SECTIONS} of {len(sections)} sections")
+        sections = sections[:ANALYSIS_MAX_SECTIONS]
+    if len(sections) == 1:
+        return _analyze_single(sections[0])
+
+    total = len(sections)
+    with ThreadPoolExecutor(max_workers=max(1, min(ANALYSIS_MAX_CONCURRENCY, total))) as pool:
+        results = list(pool.map(lambda item: _analyze_section(item[1], item[0], total), enumerate(sections)))
+
+    partials = [(analysis, len(section)) for analysis, section in zip(results, sections) if analysis is not None]
+    if not partials:
+        return {"llm_output": "Analysis failed: no section produced a valid result."}
+    logger.info(f"Merged {len(partials)} of {total} section analyses")
+    merged = reduce_analyses(partials)
+    return _result(_consolidate(merged, [analysis for analysis, _ in partials]))
+
+
+def analyze_content(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Analyze the scraped site. Content up to ANALYSIS_SINGLE_MAX_CHARS goes to the
+    LLM in one prompt; larger crawls are split into sections that are analyzed
+    concurrently and merged (ANALYSIS_MODE can force either path).
+    """
+    content = state.get("content")
+    if not content:
+        return {"llm_output": "No content to analyze."}
 
-    response = llm.invoke(messages)
-    analysis_json = response.content
-    # print(analysis_json) 
-    return {"llm_output": analysis_json}
+    if ANALYSIS_MODE == "single" or (ANALYSIS_MODE == "auto" and len(content) <= ANALYSIS_SINGLE_MAX_CHARS):
+        return _analyze_single(content)
+    return _analyze_map_reduce(content)
@@ -0,0 +1,121 @@
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Tuple
+
+from app.config import BULK_EXTRACT_PROCESSES, BULK_SCRAPE_THREADS
+from app.services.chunker import chunk_pdf_pages, chunk_web_pages
+from app.services.crawler import CrawlChanges
+from app.services.embedding_pipeline import embed_and_upsert_many
+from app.services.loader import iter_pdf_pages
+from app.services.resources import get_crawl_state
+from app.services.scraper import crawl_site
+from app.services.storage import delete_page_vectors, ensure_collection, get_collection_name, invalidate_answers
+from app.services.tenancy import mark_tenant_known
+
+logger = logging.getLogger(__name__)
+
+
+def _extract_pdf_chunks(pdf_path: str) -> List[Dict[str, Any]]:
+    # Runs in a pool process, which already provides the parallelism, so pages
+    # are read in-process here.
+    return list(chunk_pdf_pages(iter_pdf_pages(pdf_path, processes=1)))
+
+
+def _extract_url_chunks(url: str) -> Tuple[List[Dict[str, Any]], CrawlChanges]:
+    # Same crawl-state path as the ingestion graph: only changed pages are
+    # chunked, and they lose their old vectors (as do removed pages) before the
+    # new version is stored. The hashes are committed once storing succeeds.
+    crawl = crawl_site(url)
+    pages = [page._asdict() for page in crawl.changes.changed]
+    delete_page_vectors(crawl.collection_name, [page["url"] for page in pages] + crawl.changes.removed)
+    chunks = list(chunk_web_pages(pages, crawl.boilerplate))
+    # The commit needs only each page's URL and hash, not its text.
+    return chunks, crawl.changes._replace(changed=[page._replace(content="") for page in crawl.changes.changed])
+
+
+def ingest_bulk(urls: List[str], pdfs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Ingest many URLs and PDFs (given as (file name, path) pairs) in one pass.
+    PDFs are extracted on a process pool and URLs scraped on a thread pool. Their
+    chunks are embedded in shared batches as each item finishes and upserted with
+    bounded parallelism. URLs are re-crawled incrementally like single ingests.
+    Returns one result per item, URLs first, in input order. The LLM site
+    analysis is not run for bulk items.
+    """
+    results: List[Dict[str, Any]] = [
+        {"source": url, "collection_name": get_collection_name(input_url=url), "storage_info": None, "error": None}
+        for url in urls
+    ] + [
+        {"source": name, "collection_name": get_collection_name(pdf_name=name), "storage_info": None, "error": None}
+        for name, _ in pdfs
+    ]
+    if not results:
+        return results
+
+    with ProcessPoolExecutor(
+        max_workers=max(BULK_EXTRACT_PROCESSES, 1), mp_context=multiprocessing.get_context("spawn")
+    ) as processes, ThreadPoolExecutor(max_workers=max(BULK_SCRAPE_THREADS, 1)) as threads:
+        futures: Dict[Future, int] = {}
+        for index, url in enumerate(urls):
+            futures[threads.submit(_extract_url_chunks, url)] = index
+        for offset, (_, path) in enumerate(pdfs):
+            futures[processes.submit(_extract_pdf_chunks, path)] = len(urls) + offset
+
+        crawls: Dict[int, CrawlChanges] = {}
+
+        def items() -> Iterator[Tuple[str, Dict[str, Any]]]:
+            for future in as_completed(futures):
+                index = futures[future]
+                result = results[index]
+                try:
+                    if index < len(urls):
+                        chunks, crawls[index] = future.result()
+                    else:
+                        chunks = future.result()
+                except Exception as e:
+                    result["error"] = f"{type(e).__name__}: {e}"
+                    continue
+                if not chunks:
+                    result["storage_info"] = "No chunks to store"
+                    continue
+                ensure_collection(result["collection_name"])
+                for chunk in chunks:
+                    yield result["collection_name"], chunk
+
+        try:
+            stats = embed_and_upsert_many(items())
+        except Exception as e:
+            logger.exception("Bulk ingestion failed while storing chunks")
+            for result in results:
+                result["error"] = result["error"] or f"{type(e).__name__}: {e}"
+            return results
+
+    for collection_name, collection_stats in stats.items():
+        if collection_stats.stored:
+            invalidate_answers(collection_name)
+        if collection_stats.stored or collection_stats.skipped:
+            mark_tenant_known(collection_name)
+
+    for index, changes in crawls.items():
+        get_crawl_state().commit(
+            results[index]["collection_name"], [page._asdict() for page in changes.changed], changes.removed
+        )
+
+    for index, result in enumerate(results):
+        collection_stats = stats.get(result["collection_name"])
+        if result["error"]:
+            continue
+        if collection_stats is not None:
+            # Several items can share a collection, so the counts are per collection.
+            result["storage_info"] = (
+                f"Stored {collection_stats.stored} vectors in '{result['collection_name']}' "
+                f"({collection_stats.skipped} unchanged chunks skipped)"
+            )
+        changes = crawls.get(index)
+        if changes is not None:
+            result["storage_info"] = (
+                f"{len(changes.changed)} changed, {len(changes.unchanged)} unchanged, "
+                f"{len(changes.removed)} removed pages. {result['storage_info']}"
+            )
+    return results
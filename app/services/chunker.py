@@ -1,29 +1,239 @@
-from typing import List, Dict, Any
+import hashlib
+import logging
+import math
+import random
+import re
+import zlib
+from collections import Counter
+from typing import List, Dict, Any, Iterable, Iterator, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+from app.config import (
+    BOILERPLATE_MIN_FRACTION,
+    CHUNK_DEDUP,
+    CHUNK_DEDUP_THRESHOLD,
+    PDF_CHUNK_OVERLAP,
+    PDF_CHUNK_SIZE,
+    WEB_CHUNK_OVERLAP,
+    WEB_CHUNK_SIZE,
+)
 
-def chunk_web_content(content: str) -> List[Dict[str, Any]]:
-    if not content.strip():
-        return []
+logger = logging.getLogger(__name__)
 
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=400, chunk_overlap=200, separators=["\n\n", "\n", " ", ""]
-    )
-    chunks = text_splitter.split_text(content)
-    # print(chunks) 
-    return [{"content": c} for c in chunks]
 
+class ChunkProfile(NamedTuple):
+    chunk_size: int
+    chunk_overlap: int
+    # Split at markdown headings first and record the heading path as "section".
+    markdown: bool
+
+
+PROFILES = {
+    "web": ChunkProfile(WEB_CHUNK_SIZE, WEB_CHUNK_OVERLAP, markdown=True),
+    "pdf": ChunkProfile(PDF_CHUNK_SIZE, PDF_CHUNK_OVERLAP, markdown=False),
+}
+
+SEPARATORS = ["\n\n", "\n", " ", ""]
+HEADING = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+# Deeper headings stay inside their section; they rarely hold enough text on their own.
+MAX_SECTION_LEVEL = 3
+# A block must repeat on at least this many pages to count as boilerplate.
+BOILERPLATE_MIN_PAGES = 3
 
-def chunk_pdf_content(content: str) -> List[Dict[str, Any]]:
-    if not content.strip():
-        return []
 
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=400,
-        chunk_overlap=200,
+def _splitter(profile: ChunkProfile) -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=profile.chunk_size,
+        chunk_overlap=profile.chunk_overlap,
         length_function=len,
-        separators=["\n\n", "\n", " ", ""],
+        separators=SEPARATORS,
     )
 
-    chunks = splitter.split_text(content)
-    return [{"content": chunk, "metadata": {"source": "pdf_chunk"}} for chunk in chunks]
+
+def split_markdown_sections(text: str) -> List[Tuple[Optional[str], str]]:
+    """
+    (heading path, text) per markdown section, e.g. ("Pricing > Refunds", "## Refunds\\n...").
+    The heading line stays in the section text, headings inside code fences are
+    ignored, and a heading with no text of its own is merged into the next section.
+    """
+    sections: List[Tuple[Optional[str], str]] = []
+    headings: List[Tuple[int, str]] = []
+    lines: List[str] = []
+    has_body = False
+    in_fence = False
+
+    def flush() -> None:
+        if has_body:
+            title = " > ".join(heading for _, heading in headings) or None
+            sections.append((title, "\n".join(lines).strip()))
+
+    for line in text.splitlines():
+        if line.lstrip().startswith(("```", "~~~")):
+            in_fence = not in_fence
+        match = None if in_fence else HEADING.match(line)
+        if match and len(match.group(1)) <= MAX_SECTION_LEVEL:
+            if has_body:
+                flush()
+                lines, has_body = [], False
+            level = len(match.group(1))
+            while headings and headings[-1][0] >= level:
+                headings.pop()
+            headings.append((level, match.group(2)))
+            lines.append(line)
+        else:
+            lines.append(line)
+            has_body = has_body or bool(line.strip())
+    flush()
+    return sections
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha1(_normalize(text).encode("utf-8")).hexdigest()[:16]
+
+
+def _blocks(text: str) -> List[str]:
+    return [block for block in re.split(r"\n\s*\n", text) if block.strip()]
+
+
+class BoilerplateCounter:
+    """
+    Counts on how many pages each block appears, one page at a time, so the
+    pages themselves need not be kept. Lone headings are not counted, since
+    sites reuse them for real sections.
+    """
+
+    def __init__(self, min_fraction: float = BOILERPLATE_MIN_FRACTION):
+        self.min_fraction = min_fraction
+        self.pages = 0
+        self._counts: Counter = Counter()
+
+    def add(self, text: str) -> None:
+        self.pages += 1
+        self._counts.update({_text_hash(block) for block in _blocks(text) if not HEADING.match(block.strip())})
+
+    def boilerplate(self) -> Set[str]:
+        """Hashes of the blocks (paragraphs, nav lists, footers) repeated on at least `min_fraction` of the pages."""
+        needed = max(BOILERPLATE_MIN_PAGES, math.ceil(self.min_fraction * self.pages))
+        return {key for key, count in self._counts.items() if count >= needed}
+
+
+def strip_boilerplate(text: str, boilerplate: Optional[Set[str]]) -> str:
+    if not boilerplate:
+        return text
+    return "\n\n".join(block for block in _blocks(text) if _text_hash(block) not in boilerplate)
+
+
+class NearDuplicateFilter:
+    """
+    Drops chunks whose word-shingle MinHash signature estimates a Jaccard similarity
+    of at least `threshold` to a chunk already kept. Candidates come from LSH bands,
+    so each check compares against a handful of chunks rather than all of them.
+    """
+
+    NUM_PERM = 64
+    BANDS = 16
+    SHINGLE_WORDS = 3
+    _PRIME = (1 << 31) - 1
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.dropped = 0
+        rng = random.Random(0)
+        self._a = np.array([rng.randrange(1, self._PRIME) for _ in range(self.NUM_PERM)], dtype=np.uint64)
+        self._b = np.array([rng.randrange(0, self._PRIME) for _ in range(self.NUM_PERM)], dtype=np.uint64)
+        self._exact: Set[str] = set()
+        self._signatures: List[np.ndarray] = []
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = {}
+
+    def _signature(self, text: str) -> np.ndarray:
+        words = _normalize(text).split()
+        shingles = {
+            zlib.crc32(" ".join(words[i : i + self.SHINGLE_WORDS]).encode("utf-8")) % self._PRIME
+            for i in range(max(1, len(words) - self.SHINGLE_WORDS + 1))
+        }
+        values = np.fromiter(shingles, dtype=np.uint64, count=len(shingles))
+        return ((self._a[:, None] * values[None, :] + self._b[:, None]) % self._PRIME).min(axis=1)
+
+    def _bands(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        rows = self.NUM_PERM // self.BANDS
+        return [(band, signature[band * rows : (band + 1) * rows].tobytes()) for band in range(self.BANDS)]
+
+    def is_duplicate(self, text: str) -> bool:
+        key = _text_hash(text)
+        if key in self._exact:
+            self.dropped += 1
+            return True
+        signature = self._signature(text)
+        bands = self._bands(signature)
+        candidates = {index for band in bands for index in self._buckets.get(band, ())}
+        for index in candidates:
+            if np.mean(self._signatures[index] == signature) >= self.threshold:
+                self.dropped += 1
+                return True
+        self._exact.add(key)
+        self._signatures.append(signature)
+        for band in bands:
+            self._buckets.setdefault(band, []).append(len(self._signatures) - 1)
+        return False
+
+
+def _dedupe_filter() -> Optional[NearDuplicateFilter]:
+    return NearDuplicateFilter(CHUNK_DEDUP_THRESHOLD) if CHUNK_DEDUP else None
+
+
+def chunk_text(text: str, profile: ChunkProfile) -> Iterator[Tuple[Optional[str], str]]:
+    """(section title, chunk) pairs of one document under the given profile."""
+    if not text.strip():
+        return
+    splitter = _splitter(profile)
+    sections = split_markdown_sections(text) if profile.markdown else [(None, text)]
+    for title, section in sections:
+        for chunk in splitter.split_text(section):
+            yield title, chunk
+
+
+def _log_dropped(dropped: int, source: str) -> None:
+    if dropped:
+        logger.info(f"Skipped {dropped} duplicate chunks from {source}")
+
+
+def chunk_web_pages(
+    pages: Iterable[Dict[str, Any]], boilerplate: Optional[Set[str]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Chunk crawled pages one by one, tagging each chunk with its page URL and
+    section heading. Blocks in `boilerplate` (see BoilerplateCounter) are removed
+    first, and chunks that repeat an earlier one from the same page are skipped.
+    Duplicates are only looked for within a page: vectors are deleted per page
+    URL on re-crawls, so text shared by two pages needs a point under each.
+    """
+    dropped = 0
+    for page in pages:
+        dedupe = _dedupe_filter()
+        content = strip_boilerplate(page["content"], boilerplate)
+        for title, chunk in chunk_text(content, PROFILES["web"]):
+            if dedupe is not None and dedupe.is_duplicate(chunk):
+                continue
+            metadata = {"source_url": page["url"]}
+            if title:
+                metadata["section"] = title
+            yield {"content": chunk, "metadata": metadata}
+        dropped += dedupe.dropped if dedupe is not None else 0
+    _log_dropped(dropped, "crawl")
+
+
+def chunk_pdf_pages(pages: Iterable[Tuple[int, str]]) -> Iterator[Dict[str, Any]]:
+    """Chunk a PDF page by page, tagging each chunk with its page number; repeated chunks are skipped."""
+    dedupe = _dedupe_filter()
+    for page_num, text in pages:
+        for _, chunk in chunk_text(text, PROFILES["pdf"]):
+            if dedupe is not None and dedupe.is_duplicate(chunk):
+                continue
+            yield {"content": chunk, "metadata": {"source": "pdf_chunk", "page": page_num}}
+    _log_dropped(dedupe.dropped if dedupe is not None else 0, "PDF")
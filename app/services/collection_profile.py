@@ -0,0 +1,110 @@
+from typing import Any, Dict, NamedTuple, Optional
+
+from qdrant_client.http.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    HnswConfigDiff,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+)
+
+from app.config import (
+    QDRANT_COLLECTION_PROFILE,
+    QDRANT_HNSW_EF_CONSTRUCT,
+    QDRANT_HNSW_M,
+    QDRANT_SEARCH_EF,
+    QDRANT_QUANTIZATION_OVERSAMPLING,
+)
+
+
+class CollectionProfile(NamedTuple):
+    """How a collection is stored and indexed in Qdrant, and how it is searched."""
+
+    hnsw_m: int
+    hnsw_ef_construct: int
+    # Keep original vectors (and the HNSW graph) on disk instead of in RAM.
+    on_disk: bool
+    # "none", "scalar" (int8, 4x smaller) or "binary" (1 bit, 32x smaller).
+    quantization: str
+    # Re-score quantized candidates with the original vectors.
+    rescore: bool
+    oversampling: float
+    # hnsw_ef at search time; 0 leaves Qdrant's default.
+    search_ef: int
+
+
+PROFILES: Dict[str, CollectionProfile] = {
+    # Qdrant defaults: everything in RAM, no quantization.
+    "balanced": CollectionProfile(
+        hnsw_m=16, hnsw_ef_construct=100, on_disk=False, quantization="none",
+        rescore=False, oversampling=1.0, search_ef=0,
+    ),
+    # int8 vectors in RAM, originals on disk for rescoring.
+    "low_memory": CollectionProfile(
+        hnsw_m=16, hnsw_ef_construct=100, on_disk=True, quantization="scalar",
+        rescore=True, oversampling=2.0, search_ef=64,
+    ),
+    # 1-bit vectors in RAM; needs more oversampling to keep recall.
+    "binary": CollectionProfile(
+        hnsw_m=16, hnsw_ef_construct=100, on_disk=True, quantization="binary",
+        rescore=True, oversampling=3.0, search_ef=64,
+    ),
+}
+
+
+def get_collection_profile(name: Optional[str] = None) -> CollectionProfile:
+    """The named profile (QDRANT_COLLECTION_PROFILE by default) with any env overrides."""
+    name = name or QDRANT_COLLECTION_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"Unknown collection profile '{name}', expected one of {sorted(PROFILES)}")
+    profile = PROFILES[name]
+    overrides: Dict[str, Any] = {}
+    if QDRANT_HNSW_M > 0:
+        overrides["hnsw_m"] = QDRANT_HNSW_M
+    if QDRANT_HNSW_EF_CONSTRUCT > 0:
+        overrides["hnsw_ef_construct"] = QDRANT_HNSW_EF_CONSTRUCT
+    if QDRANT_SEARCH_EF > 0:
+        overrides["search_ef"] = QDRANT_SEARCH_EF
+    if QDRANT_QUANTIZATION_OVERSAMPLING > 0:
+        overrides["oversampling"] = QDRANT_QUANTIZATION_OVERSAMPLING
+    return profile._replace(**overrides)
+
+
+def collection_index_kwargs(profile: CollectionProfile, multitenant: bool = False) -> Dict[str, Any]:
+    """
+    create_collection arguments for HNSW and quantization; vectors are configured
+    separately. A multitenant collection gets per-tenant graphs (payload_m) instead
+    of one global graph, since every search is filtered to a single tenant.
+    """
+    if multitenant:
+        hnsw_config = HnswConfigDiff(
+            m=0, payload_m=profile.hnsw_m, ef_construct=profile.hnsw_ef_construct, on_disk=profile.on_disk
+        )
+    else:
+        hnsw_config = HnswConfigDiff(
+            m=profile.hnsw_m, ef_construct=profile.hnsw_ef_construct, on_disk=profile.on_disk
+        )
+    kwargs: Dict[str, Any] = {"hnsw_config": hnsw_config}
+    if profile.quantization == "scalar":
+        kwargs["quantization_config"] = ScalarQuantization(
+            scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    elif profile.quantization == "binary":
+        kwargs["quantization_config"] = BinaryQuantization(
+            binary=BinaryQuantizationConfig(always_ram=True)
+        )
+    return kwargs
+
+
+def search_params(profile: CollectionProfile) -> Optional[SearchParams]:
+    if profile.quantization == "none" and profile.search_ef <= 0:
+        return None
+    quantization = None
+    if profile.quantization != "none":
+        quantization = QuantizationSearchParams(
+            rescore=profile.rescore, oversampling=profile.oversampling
+        )
+    return SearchParams(hnsw_ef=profile.search_ef or None, quantization=quantization)
@@ -0,0 +1,89 @@
+import math
+from typing import Any, Dict, List
+
+from app.config import (
+    CHARS_PER_TOKEN,
+    CONTEXT_MIN_OVERLAP,
+    CONTEXT_TOKEN_BUDGET,
+    HISTORY_MAX_MESSAGES,
+    HISTORY_TOKEN_BUDGET,
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Character-based token estimate; close enough for budgeting Llama-style tokenizers."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of `left` that is also a prefix of `right`."""
+    for length in range(min(len(left), len(right)), CONTEXT_MIN_OVERLAP - 1, -1):
+        if left.endswith(right[:length]):
+            return length
+    return 0
+
+
+def _trim_against(text: str, kept: List[str]) -> str:
+    """Strip the parts of `text` that overlap a chunk already in the context."""
+    for other in kept:
+        if text in other:
+            return ""
+        head = _overlap(other, text)
+        if head:
+            text = text[head:]
+        tail = _overlap(text, other)
+        if tail:
+            text = text[: len(text) - tail]
+    return text.strip()
+
+
+def pack_context(chunks: List[Dict[str, Any]], budget: int = CONTEXT_TOKEN_BUDGET) -> List[Dict[str, Any]]:
+    """
+    Take chunks in ranked order, drop text they share with higher-ranked chunks
+    (the splitter's overlap), and keep each one that still fits the token budget.
+    A top chunk larger than the whole budget is cut down to it, keeping its start,
+    so the context is never empty while chunks were retrieved.
+    """
+    packed: List[Dict[str, Any]] = []
+    kept_texts: List[str] = []
+    used = 0
+    for chunk in chunks:
+        text = _trim_against(chunk["content"], kept_texts)
+        if not text:
+            continue
+        cost = estimate_tokens(text)
+        if not packed and cost > budget > 0:
+            text = text[: budget * CHARS_PER_TOKEN - 1] + "…"
+            cost = budget
+        if used + cost > budget:
+            continue
+        kept_texts.append(chunk["content"])
+        packed.append({**chunk, "content": text})
+        used += cost
+    return packed
+
+
+def trim_history(
+    history: List[Dict[str, str]],
+    budget: int = HISTORY_TOKEN_BUDGET,
+    max_messages: int = HISTORY_MAX_MESSAGES,
+) -> List[Dict[str, str]]:
+    """
+    Keep the most recent messages that fit the budget. The oldest message that
+    only partly fits is cut down to the remaining budget, keeping its end.
+    """
+    trimmed: List[Dict[str, str]] = []
+    used = 0
+    for message in reversed(history[-max_messages:] if max_messages > 0 else []):
+        remaining = budget - used
+        if remaining <= 0:
+            break
+        content = message["content"]
+        cost = estimate_tokens(content)
+        if cost > remaining:
+            content = "…" + content[-remaining * CHARS_PER_TOKEN :]
+            cost = remaining
+        trimmed.append({**message, "content": content})
+        used += cost
+    trimmed.reverse()
+    return trimmed
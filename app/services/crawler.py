@@ -0,0 +1,189 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from app.config import CRAWL_CONCURRENCY, CRAWL_PAGE_LIMIT
+from app.services.resources import get_firecrawl
+
+logger = logging.getLogger(__name__)
+
+# Scrape statuses meaning the page is gone for good, so its vectors can be dropped.
+GONE_STATUSES = {404, 410}
+
+
+class CrawledPage(NamedTuple):
+    url: str
+    content: str
+    content_hash: str
+    # Set when the page was discovered but could not be scraped; such pages are
+    # not re-indexed, and only count as removed when `status_code` says the page is gone.
+    error: Optional[str] = None
+    status_code: Optional[int] = None
+
+
+class CrawlChanges(NamedTuple):
+    changed: List[CrawledPage]
+    unchanged: List[str]
+    removed: List[str]
+
+
+def _link_url(link: Any) -> str:
+    return link if isinstance(link, str) else link.url
+
+
+def _failed_page(url: str, error: str, status_code: Optional[int] = None) -> CrawledPage:
+    return CrawledPage(url=url, content="", content_hash="", error=error, status_code=status_code)
+
+
+def _scrape_page(client: Any, url: str) -> Optional[CrawledPage]:
+    document = client.scrape(url, formats=["markdown"])
+    metadata = getattr(document, "metadata", None)
+    status_code = getattr(metadata, "status_code", None)
+    if status_code in GONE_STATUSES:
+        return _failed_page(url, f"HTTP {status_code}", status_code)
+    content = document.markdown or getattr(document, "raw_html", None) or ""
+    if not content.strip():
+        return None
+    return CrawledPage(
+        url=url,
+        content=content,
+        content_hash=hashlib.sha256(content.encode("utf-8")).hexdigest(),
+    )
+
+
+def map_site(url: str, limit: int = CRAWL_PAGE_LIMIT, client: Any = None) -> Tuple[List[str], bool]:
+    """
+    Up to `limit` page URLs of a site, starting with `url`, and whether the map
+    is complete, i.e. listed fewer links than the limit. Only a complete map
+    shows that a page missing from it has left the site.
+    """
+    client = client or get_firecrawl()
+    links = [_link_url(link) for link in client.map(url, limit=limit).links]
+    return list(dict.fromkeys([url, *links]))[:limit], len(links) < limit
+
+
+def iter_crawl_pages(
+    urls: Iterable[str],
+    concurrency: int = CRAWL_CONCURRENCY,
+    client: Any = None,
+) -> Iterator[CrawledPage]:
+    """
+    Scrape the given pages and yield them as they finish, with up to
+    `concurrency` scrapes in flight. `client` is anything with Firecrawl's
+    scrape method, defaulting to the shared Firecrawl client. Pages that
+    fail to scrape are yielded with `error` set and no content; empty pages are
+    skipped.
+    """
+    client = client or get_firecrawl()
+
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+        futures = {pool.submit(_scrape_page, client, page_url): page_url for page_url in urls}
+        for future in as_completed(futures):
+            try:
+                page = future.result()
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+                logger.warning(f"Failed to scrape {futures[future]}: {error}")
+                yield _failed_page(futures[future], error, getattr(e, "status_code", None))
+                continue
+            if page is not None:
+                yield page
+
+
+class CrawlDiff:
+    """
+    Compares crawled pages with the recorded hashes one at a time, so a crawl
+    never has to be held in memory. A recorded page counts as removed only when
+    it scraped as 404/410, or when a complete map no longer lists it; pages that
+    failed to scrape or came back empty keep their vectors.
+    """
+
+    def __init__(self, known: Dict[str, str], mapped_urls: List[str], map_complete: bool):
+        self._known = known
+        self._mapped: Set[str] = set(mapped_urls)
+        self._map_complete = map_complete
+        self._gone: List[str] = []
+        self.changed: List[CrawledPage] = []
+        self.unchanged: List[str] = []
+
+    def add(self, page: CrawledPage) -> bool:
+        """Record one page; True when it is new or changed and needs indexing."""
+        if page.error is not None:
+            if page.status_code in GONE_STATUSES and page.url in self._known:
+                self._gone.append(page.url)
+            return False
+        if self._known.get(page.url) == page.content_hash:
+            self.unchanged.append(page.url)
+            return False
+        self.changed.append(page)
+        return True
+
+    def changes(self) -> CrawlChanges:
+        removed = list(self._gone)
+        if self._map_complete:
+            removed += [url for url in self._known if url not in self._mapped]
+        return CrawlChanges(changed=self.changed, unchanged=self.unchanged, removed=removed)
+
+
+class CrawlStateStore:
+    """Content hash of every page last ingested into each collection, kept in SQLite."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                collection TEXT NOT NULL,
+                url TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (collection, url)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def hashes(self, collection_name: str) -> Dict[str, str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, content_hash FROM pages WHERE collection = ?", (collection_name,)
+            ).fetchall()
+        return dict(rows)
+
+    def diff(self, collection_name: str, mapped_urls: List[str], map_complete: bool) -> CrawlDiff:
+        """Start comparing a crawl of the collection's site; see CrawlDiff."""
+        return CrawlDiff(self.hashes(collection_name), mapped_urls, map_complete)
+
+    def commit(
+        self, collection_name: str, changed: List[Dict[str, Any]], removed: List[str]
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO pages (collection, url, content_hash, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (collection_name, page["url"], page["content_hash"], now)
+                    for page in changed
+                ],
+            )
+            self._conn.executemany(
+                "DELETE FROM pages WHERE collection = ? AND url = ?",
+                [(collection_name, url) for url in removed],
+            )
+            self._conn.commit()
+
+    def forget(self, collection_name: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM pages WHERE collection = ?", (collection_name,))
+            self._conn.commit()
@@ -0,0 +1,125 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Namespace for point IDs derived from chunk hashes; changing it would orphan
+# every point written so far.
+POINT_ID_NAMESPACE = uuid.UUID("5b0d8c1e-7a0f-4f43-9d4e-3c2a8f6b1e27")
+_SQLITE_MAX_PARAMS = 500
+# Eviction trims the table to this share of max_entries, so a full cache is
+# recounted about once per tenth of max_entries inserts rather than every batch.
+_EVICT_TO_FRACTION = 0.9
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.split())
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def point_id_for(text_hash: str, source: str = "") -> str:
+    """
+    Point ID for a chunk. Chunks tagged with a source (e.g. a crawled page URL) get
+    one point per source, so deleting one page's vectors never removes text that
+    another page still contains.
+    """
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{source}\n{text_hash}" if source else text_hash))
+
+
+class EmbeddingCache:
+    """
+    Persistent (model, chunk hash) -> vector cache in SQLite.
+    Least recently used rows are evicted once the table exceeds max_entries.
+    Safe to share between threads and between workers on one host.
+
+    The row count is estimated from this process's inserts and only counted
+    exactly when the estimate passes max_entries. Replaced rows and other
+    workers' inserts make the estimate drift, which the recount corrects.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._estimated_count: Optional[int] = None
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        if not hashes:
+            return found
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(hashes), _SQLITE_MAX_PARAMS):
+                part = hashes[start : start + _SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *part],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = np.frombuffer(blob, dtype=np.float32)
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(now, model, text_hash) for text_hash in found],
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, np.ndarray]) -> None:
+        if not vectors:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                [
+                    (model, text_hash, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                    for text_hash, vector in vectors.items()
+                ],
+            )
+            if self._estimated_count is not None:
+                self._estimated_count += len(vectors)
+            if self._estimated_count is None or self._estimated_count > self.max_entries:
+                self._estimated_count = self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> int:
+        """Count the rows exactly and, past max_entries, drop the least recently used; returns the new count."""
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        if count <= self.max_entries:
+            return count
+        overflow = count - int(self.max_entries * _EVICT_TO_FRACTION)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+            (overflow,),
+        )
+        return count - overflow
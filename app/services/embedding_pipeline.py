@@ -0,0 +1,245 @@
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from qdrant_client.http.models import PointStruct
+
+from app.config import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_PROCESSES,
+    EMBEDDING_QUEUE_SIZE,
+    QDRANT_UPSERT_WORKERS,
+)
+from app.services.embedding_cache import content_hash, point_id_for
+from app.services.hybrid import is_hybrid_collection, point_vector
+from app.services.resources import (
+    embedding_cache_key,
+    get_embedding_cache,
+    get_embeddings,
+    get_qdrant_client,
+)
+from app.services.tenancy import physical_collection, tenant_payload, tenant_point_source
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_worker_embeddings = None
+
+
+def _init_embedding_worker() -> None:
+    global _worker_embeddings
+    _worker_embeddings = get_embeddings()
+
+
+def _embed_in_worker(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_embeddings.embed_documents(texts), dtype=np.float32)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    # Spawned rather than forked: forking a process that already holds torch
+    # threads can deadlock the children.
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(
+                    max_workers=EMBEDDING_PROCESSES,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_embedding_worker,
+                )
+    return _pool
+
+
+def embed_texts(texts: List[str]) -> np.ndarray:
+    return np.asarray(get_embeddings().embed_documents(texts), dtype=np.float32)
+
+
+class UpsertStats(NamedTuple):
+    stored: int
+    skipped: int
+
+
+# (collection name, point id, chunk hash, chunk)
+PendingChunk = Tuple[str, str, str, Dict[str, Any]]
+
+
+def iter_batches(chunks: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    iterator = iter(chunks)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _new_chunk_batches(
+    items: Iterable[Tuple[str, Dict[str, Any]]], skipped: Dict[str, int]
+) -> Iterator[List[PendingChunk]]:
+    """Drop chunks whose deterministic point already exists in their collection."""
+    client = get_qdrant_client()
+    for batch in iter_batches(items, EMBEDDING_BATCH_SIZE):
+        pending: Dict[str, Dict[str, PendingChunk]] = {}
+        for collection_name, chunk in batch:
+            text_hash = content_hash(chunk["content"])
+            source = tenant_point_source(collection_name, chunk.get("metadata", {}).get("source_url", ""))
+            point_id = point_id_for(text_hash, source)
+            by_id = pending.setdefault(collection_name, {})
+            if point_id in by_id:
+                skipped[collection_name] = skipped.get(collection_name, 0) + 1
+            else:
+                by_id[point_id] = (collection_name, point_id, text_hash, chunk)
+
+        new_items: List[PendingChunk] = []
+        for collection_name, by_id in pending.items():
+            existing = {
+                str(point.id)
+                for point in client.retrieve(
+                    collection_name=physical_collection(collection_name),
+                    ids=list(by_id),
+                    with_payload=False,
+                    with_vectors=False,
+                )
+            }
+            skipped[collection_name] = skipped.get(collection_name, 0) + len(existing)
+            new_items.extend(item for point_id, item in by_id.items() if point_id not in existing)
+        if new_items:
+            yield new_items
+
+
+def _start_batch(items: List[PendingChunk]) -> Tuple[Any, ...]:
+    """Look up cached vectors and start embedding the rest, in-process or on the pool."""
+    hashes = list(dict.fromkeys(text_hash for _, _, text_hash, _ in items))
+    cache = get_embedding_cache()
+    cached = cache.get_many(embedding_cache_key(), hashes) if cache else {}
+    texts_by_hash = {text_hash: chunk["content"] for _, _, text_hash, chunk in items}
+    missing = [text_hash for text_hash in hashes if text_hash not in cached]
+    texts = [texts_by_hash[text_hash] for text_hash in missing]
+    if not texts:
+        job = None
+    elif EMBEDDING_PROCESSES > 1:
+        job = _get_pool().submit(_embed_in_worker, texts)
+    else:
+        job = embed_texts(texts)
+    return items, cached, missing, job
+
+
+def _finish_batch(items, cached, missing, job) -> Tuple[List[PendingChunk], np.ndarray]:
+    if job is not None:
+        vectors = job if isinstance(job, np.ndarray) else job.result()
+        fresh = dict(zip(missing, vectors))
+        cache = get_embedding_cache()
+        if cache:
+            cache.put_many(embedding_cache_key(), fresh)
+        cached = {**cached, **fresh}
+    return items, np.stack([cached[text_hash] for _, _, text_hash, _ in items])
+
+
+def _embed_batches(
+    batches: Iterable[List[PendingChunk]],
+) -> Iterator[Tuple[List[PendingChunk], np.ndarray]]:
+    # With a process pool, keep at most one batch in flight per worker so a
+    # huge document is never fully materialised ahead of the embedder.
+    in_flight = deque()
+    for batch in batches:
+        in_flight.append(_start_batch(batch))
+        if len(in_flight) >= max(EMBEDDING_PROCESSES, 1):
+            yield _finish_batch(*in_flight.popleft())
+    while in_flight:
+        yield _finish_batch(*in_flight.popleft())
+
+
+def embed_and_upsert_many(
+    items: Iterable[Tuple[str, Dict[str, Any]]],
+) -> Dict[str, UpsertStats]:
+    """
+    Embed (collection name, chunk) pairs in shared fixed-size batches and upsert each
+    batch as soon as it is ready. Point IDs are derived from the chunk text, so chunks
+    already in their collection are skipped and vectors for previously seen text come
+    from the embedding cache. Uploads run on QDRANT_UPSERT_WORKERS threads behind a
+    bounded queue, so embedding blocks when Qdrant falls behind instead of buffering
+    the whole corpus.
+    """
+    client = get_qdrant_client()
+    upload_queue: "queue.Queue[Optional[Tuple[str, List[PointStruct]]]]" = queue.Queue(
+        maxsize=EMBEDDING_QUEUE_SIZE
+    )
+    errors: List[Exception] = []
+
+    def uploader() -> None:
+        while True:
+            task = upload_queue.get()
+            if task is None:
+                return
+            if errors:
+                continue
+            collection_name, points = task
+            try:
+                client.upsert(collection_name=collection_name, points=points, wait=True)
+            except Exception as e:
+                errors.append(e)
+
+    upload_threads = [
+        threading.Thread(target=uploader, daemon=True)
+        for _ in range(max(QDRANT_UPSERT_WORKERS, 1))
+    ]
+    for thread in upload_threads:
+        thread.start()
+
+    stored: Dict[str, int] = {}
+    skipped: Dict[str, int] = {}
+    hybrid: Dict[str, bool] = {}
+    start = time.perf_counter()
+    try:
+        for batch, vectors in _embed_batches(_new_chunk_batches(items, skipped)):
+            if errors:
+                break
+            points_by_collection: Dict[str, List[PointStruct]] = {}
+            for (collection_name, point_id, _, chunk), vector in zip(batch, vectors):
+                if collection_name not in hybrid:
+                    hybrid[collection_name] = is_hybrid_collection(physical_collection(collection_name))
+                points_by_collection.setdefault(collection_name, []).append(
+                    PointStruct(
+                        id=point_id,
+                        vector=point_vector(vector.tolist(), chunk["content"], hybrid[collection_name]),
+                        payload={
+                            "page_content": chunk["content"],
+                            "metadata": chunk.get("metadata", {}),
+                            **tenant_payload(collection_name),
+                        },
+                    )
+                )
+            for collection_name, points in points_by_collection.items():
+                upload_queue.put((physical_collection(collection_name), points))
+                stored[collection_name] = stored.get(collection_name, 0) + len(points)
+    finally:
+        for _ in upload_threads:
+            upload_queue.put(None)
+        for thread in upload_threads:
+            thread.join()
+
+    if errors:
+        raise errors[0]
+
+    elapsed = time.perf_counter() - start
+    total = sum(stored.values())
+    unchanged = sum(skipped.values())
+    rate = (total + unchanged) / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        f"Stored {total} chunks in {len(stored)} collections, skipped {unchanged} unchanged, "
+        f"in {elapsed:.2f}s ({rate:.1f} chunks/sec)"
+    )
+    return {
+        name: UpsertStats(stored=stored.get(name, 0), skipped=skipped.get(name, 0))
+        for name in set(stored) | set(skipped)
+    }
+
+
+def embed_and_upsert(chunks: Iterable[Dict[str, Any]], collection_name: str) -> UpsertStats:
+    """Single-collection form of embed_and_upsert_many."""
+    stats = embed_and_upsert_many((collection_name, chunk) for chunk in chunks)
+    return stats.get(collection_name, UpsertStats(stored=0, skipped=0))
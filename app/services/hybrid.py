@@ -0,0 +1,171 @@
+import re
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set
+
+from qdrant_client.http.models import (
+    Distance,
+    Filter,
+    Fusion,
+    FusionQuery,
+    Modifier,
+    Prefetch,
+    QueryRequest,
+    SparseIndexParams,
+    SparseVector,
+    SparseVectorParams,
+    VectorParams,
+)
+
+from app.config import (
+    BM25_AVG_DOC_LENGTH,
+    BM25_B,
+    BM25_K1,
+    HYBRID_PREFETCH_LIMIT,
+    RETRIEVAL_MODE,
+)
+from app.services.collection_profile import get_collection_profile, search_params
+from app.services.resources import get_async_qdrant_client, get_qdrant_client
+
+# Named vectors of a hybrid collection. Collections created before hybrid
+# retrieval have a single unnamed dense vector and are still searched densely.
+DENSE_VECTOR = "dense"
+SPARSE_VECTOR = "sparse"
+
+# Keeps codes like "ERR-404", "v2.1" or "PRO_PLAN" as one token.
+_TOKEN_PATTERN = re.compile(r"\w+(?:[-._/]\w+)*")
+_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for",
+    "from", "how", "i", "if", "in", "is", "it", "me", "my", "of", "on", "or",
+    "our", "so", "that", "the", "this", "to", "was", "we", "what", "when",
+    "where", "which", "who", "why", "will", "with", "you", "your",
+}
+
+_hybrid_collections: Set[str] = set()
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        token
+        for token in _TOKEN_PATTERN.findall(text.lower())
+        if token not in _STOPWORDS
+    ]
+
+
+def _token_id(token: str) -> int:
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def sparse_document_vector(text: str) -> SparseVector:
+    """
+    BM25 term weights for a chunk. The IDF half of BM25 is applied by Qdrant at
+    query time (Modifier.IDF), so it stays correct as the collection grows.
+    """
+    counts = Counter(_token_id(token) for token in tokenize(text))
+    length = sum(counts.values())
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / BM25_AVG_DOC_LENGTH)
+    indices = list(counts)
+    values = [tf * (BM25_K1 + 1) / (tf + norm) for tf in counts.values()]
+    return SparseVector(indices=indices, values=values)
+
+
+def sparse_query_vector(text: str) -> Optional[SparseVector]:
+    indices = sorted({_token_id(token) for token in tokenize(text)})
+    if not indices:
+        return None
+    return SparseVector(indices=indices, values=[1.0] * len(indices))
+
+
+def collection_vectors_config(dimension: int, on_disk: bool = False) -> Dict[str, Any]:
+    """Keyword arguments for create_collection in the configured retrieval mode."""
+    dense = VectorParams(size=dimension, distance=Distance.COSINE, on_disk=on_disk)
+    if RETRIEVAL_MODE != "hybrid":
+        return {"vectors_config": dense}
+    return {
+        "vectors_config": {DENSE_VECTOR: dense},
+        "sparse_vectors_config": {
+            SPARSE_VECTOR: SparseVectorParams(
+                index=SparseIndexParams(on_disk=on_disk), modifier=Modifier.IDF
+            )
+        },
+    }
+
+
+def _has_named_vectors(info: Any) -> bool:
+    return isinstance(info.config.params.vectors, dict)
+
+
+def is_hybrid_collection(collection_name: str) -> bool:
+    # Only positive answers are cached: a collection never loses its named
+    # vectors, but a legacy one may be dropped and recreated as hybrid.
+    if collection_name in _hybrid_collections:
+        return True
+    if _has_named_vectors(get_qdrant_client().get_collection(collection_name)):
+        _hybrid_collections.add(collection_name)
+        return True
+    return False
+
+
+async def ais_hybrid_collection(collection_name: str) -> bool:
+    if collection_name in _hybrid_collections:
+        return True
+    if _has_named_vectors(await get_async_qdrant_client().get_collection(collection_name)):
+        _hybrid_collections.add(collection_name)
+        return True
+    return False
+
+
+def point_vector(dense: List[float], text: str, hybrid: bool) -> Any:
+    if not hybrid:
+        return dense
+    return {DENSE_VECTOR: dense, SPARSE_VECTOR: sparse_document_vector(text)}
+
+
+def hybrid_query_kwargs(
+    question: str, query_vector: List[float], limit: int, query_filter: Optional[Filter] = None
+) -> Dict[str, Any]:
+    """
+    query_points arguments that fuse dense and BM25 candidates with reciprocal rank
+    fusion on the server, returning only the top `limit` with their dense vectors.
+    """
+    params = search_params(get_collection_profile())
+    sparse = sparse_query_vector(question) if RETRIEVAL_MODE == "hybrid" else None
+    if sparse is None:
+        return {
+            "query": query_vector,
+            "using": DENSE_VECTOR,
+            "query_filter": query_filter,
+            "search_params": params,
+            "limit": limit,
+            "with_vectors": [DENSE_VECTOR],
+        }
+    prefetch_limit = max(HYBRID_PREFETCH_LIMIT, limit)
+    return {
+        "prefetch": [
+            Prefetch(
+                query=query_vector, using=DENSE_VECTOR, filter=query_filter, params=params, limit=prefetch_limit
+            ),
+            Prefetch(query=sparse, using=SPARSE_VECTOR, filter=query_filter, limit=prefetch_limit),
+        ],
+        "query": FusionQuery(fusion=Fusion.RRF),
+        "limit": limit,
+        "with_vectors": [DENSE_VECTOR],
+    }
+
+
+def dense_query_kwargs(
+    query_vector: List[float], limit: int, query_filter: Optional[Filter] = None
+) -> Dict[str, Any]:
+    return {
+        "query": query_vector,
+        "query_filter": query_filter,
+        "search_params": search_params(get_collection_profile()),
+        "limit": limit,
+        "with_vectors": True,
+    }
+
+
+def as_query_request(query: Dict[str, Any]) -> QueryRequest:
+    """The same query as a QueryRequest for query_batch_points, which names some fields differently."""
+    renamed = {"query_filter": "filter", "search_params": "params", "with_vectors": "with_vector"}
+    return QueryRequest(with_payload=True, **{renamed.get(key, key): value for key, value in query.items()})
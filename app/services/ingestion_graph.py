@@ -1,21 +1,43 @@
-from typing import TypedDict, List, Dict, Any, Optional
+from typing import Annotated, TypedDict, List, Dict, Any, Optional
 from langgraph.graph import StateGraph, START, END
 from app.services.scraper import scrape_content
-from app.services.loader import load_pdf_content
+from app.services.loader import inspect_pdf, iter_pdf_pages
+from app.config import FAQ_PRECOMPUTE_ANSWERS, FAQ_PRECOMPUTE_LIMIT
+from app.models.schemas import SiteAnalysis
 from app.services.analyzer import analyze_content
-from app.services.chunker import chunk_web_content, chunk_pdf_content
-from app.services.storage import store_chunks
+from app.services.chunker import chunk_web_pages, chunk_pdf_pages
+from app.services.metrics import timed_node
+from app.services.qa import precompute_answers
+from app.services.resources import get_crawl_state, get_embeddings, get_faq_index
+from app.services.site_analysis import FaqEntry, faq_entries, suggested_questions
+from app.services.storage import delete_page_vectors, get_collection_name, store_chunk_stream
+
+
+def _merge_seconds(left: Optional[Dict[str, float]], right: Optional[Dict[str, float]]) -> Dict[str, float]:
+    return {**(left or {}), **(right or {})}
 
 
 class GraphState(TypedDict):
     input_url: Optional[str] = None
     pdf_path: Optional[str] = None
+    # Original file name of an uploaded PDF; pdf_path is a temporary file.
+    pdf_name: Optional[str] = None
     content: Optional[str] = None
+    pages: Optional[List[Dict[str, Any]]] = None
+    unchanged_pages: Optional[int] = None
+    removed_urls: Optional[List[str]] = None
+    # Hashes of blocks repeated across the crawl, stripped before chunking.
+    boilerplate: Optional[List[str]] = None
+    page_count: Optional[int] = None
     llm_output: Optional[str] = None
+    # The validated analysis behind llm_output; missing when the LLM reply was not valid JSON.
+    analysis: Optional[Dict[str, Any]] = None
     chunks: Optional[List[Dict[str, Any]]] = None
     collection_name: Optional[str] = None
     storage_info: Optional[str] = None
     error: Optional[str] = None
+    # Run time of each node (see timed_node); parallel nodes each add their own.
+    node_seconds: Annotated[Dict[str, float], _merge_seconds] = None
 
 
 def router(state: GraphState) -> str:
@@ -36,23 +58,75 @@ def error_node(state: GraphState) -> Dict[str, Any]:
     return {"error": "Provide either input_url or pdf_path."}
 
 
+def index_web_content(state: GraphState) -> Dict[str, Any]:
+    # Chunk and store in one node so the whole indexing path runs in the same
+    # superstep as "analyze" instead of waiting for it at a step boundary.
+    if state.get("error"):
+        return {}
+    pages = state.get("pages") or []
+    removed_urls = state.get("removed_urls") or []
+    collection_name = get_collection_name(input_url=state["input_url"])
+
+    # Changed pages lose their old vectors before the new version is stored.
+    delete_page_vectors(collection_name, [page["url"] for page in pages] + removed_urls)
+    boilerplate = set(state.get("boilerplate") or [])
+    result = store_chunk_stream(chunk_web_pages(pages, boilerplate), collection_name)
+    get_crawl_state().commit(collection_name, pages, removed_urls)
+
+    return {
+        "collection_name": collection_name,
+        "storage_info": (
+            f"{len(pages)} changed, {state.get('unchanged_pages') or 0} unchanged, "
+            f"{len(removed_urls)} removed pages. {result['storage_info']}"
+        ),
+    }
+
+
+def index_site_analysis(state: GraphState) -> Dict[str, Any]:
+    # Runs once both the analysis and the indexing are done, so precomputed
+    # answers are retrieved from the freshly stored pages.
+    collection_name = state.get("collection_name")
+    if state.get("error") or not state.get("analysis") or not collection_name:
+        return {}
+    analysis = SiteAnalysis.model_validate(state["analysis"])
+    entries = faq_entries(analysis)
+    # With no page re-indexed, answers precomputed by an earlier ingest still
+    # hold (any other write to the collection drops them; see invalidate_answers).
+    changed = bool(state.get("pages") or state.get("removed_urls"))
+    if FAQ_PRECOMPUTE_ANSWERS and changed:
+        questions = suggested_questions(analysis)[:FAQ_PRECOMPUTE_LIMIT]
+        answers = precompute_answers(questions, collection_name)
+        entries += [FaqEntry(question, answer, "query") for question, answer in answers.items()]
+    vectors = get_embeddings().embed_documents([entry.question for entry in entries]) if entries else []
+    get_faq_index().replace(collection_name, analysis, entries, vectors, keep_answers=FAQ_PRECOMPUTE_ANSWERS and not changed)
+    return {}
+
+
+def index_pdf_content(state: GraphState) -> Dict[str, Any]:
+    # Pages stream from the loader through the chunker into the embedding
+    # pipeline, so memory stays flat regardless of document size.
+    pdf_path = state["pdf_path"]
+    chunks = chunk_pdf_pages(iter_pdf_pages(pdf_path))
+    collection_name = get_collection_name(pdf_path=pdf_path, pdf_name=state.get("pdf_name") or "")
+    return store_chunk_stream(chunks, collection_name)
+
+
+def after_pdf_loader(state: GraphState) -> str:
+    return "end" if state.get("error") else "index_pdf"
+
+
 def build_ingestion_graph() -> Any:
     graph_builder = StateGraph(GraphState)
 
-    graph_builder.add_node("scrape", scrape_content)
-    graph_builder.add_node("analyze", analyze_content)
-    graph_builder.add_node(
-        "chunk_web", lambda state: {"chunks": chunk_web_content(state["content"])}
-    )
-    graph_builder.add_node("store_web", store_chunks)
+    graph_builder.add_node("scrape", timed_node("scrape", scrape_content))
+    graph_builder.add_node("analyze", timed_node("analyze", analyze_content))
+    graph_builder.add_node("index_web", timed_node("index_web", index_web_content))
+    graph_builder.add_node("index_analysis", timed_node("index_analysis", index_site_analysis))
 
-    graph_builder.add_node("pdf_loader", load_pdf_content)
-    graph_builder.add_node(
-        "chunk_pdf", lambda state: {"chunks": chunk_pdf_content(state["content"])}
-    )
-    graph_builder.add_node("store_pdf", store_chunks)
+    graph_builder.add_node("pdf_loader", timed_node("pdf_loader", inspect_pdf))
+    graph_builder.add_node("index_pdf", timed_node("index_pdf", index_pdf_content))
 
-    graph_builder.add_node("error", error_node)
+    graph_builder.add_node("error", timed_node("error", error_node))
 
     graph_builder.add_conditional_edges(
         START,
@@ -60,15 +134,18 @@ def build_ingestion_graph() -> Any:
         {"scrape": "scrape", "pdf_loader": "pdf_loader", "error": "error"},
     )
 
+    # The analysis does not feed indexing, so both branches start from the
+    # scrape; the analysis is stored once the slower of the two has finished.
     graph_builder.add_edge("scrape", "analyze")
-    graph_builder.add_edge("analyze", "chunk_web")
-    graph_builder.add_edge("chunk_web", "store_web")
-    graph_builder.add_edge("store_web", END)
+    graph_builder.add_edge("scrape", "index_web")
+    graph_builder.add_edge(["analyze", "index_web"], "index_analysis")
+    graph_builder.add_edge("index_analysis", END)
 
-    graph_builder.add_edge("pdf_loader", "chunk_pdf")
-    graph_builder.add_edge("chunk_pdf", "store_pdf")
-    graph_builder.add_edge("store_pdf", END)
+    graph_builder.add_conditional_edges(
+        "pdf_loader", after_pdf_loader, {"index_pdf": "index_pdf", "end": END}
+    )
+    graph_builder.add_edge("index_pdf", END)
 
     graph_builder.add_edge("error", END)
 
-    return graph_builder.compile()  
+    return graph_builder.compile()
@@ -0,0 +1,242 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from app.config import INGEST_JOB_LEASE_SECONDS
+from app.services.resources import get_ingestion_graph
+
+logger = logging.getLogger(__name__)
+
+RESULT_KEYS = ("collection_name", "storage_info", "llm_output", "error")
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+# Identifies this process as a job owner. PIDs repeat across container restarts
+# (uvicorn is often PID 1 on every boot), so a fresh token is drawn per process.
+BOOT_TOKEN = uuid.uuid4().hex
+
+
+class JobStore:
+    """
+    SQLite-backed record of ingestion jobs, so status survives restarts. Each
+    unfinished job holds a lease that its owning process keeps renewing; a job
+    whose lease has run out belongs to a process that is gone.
+    """
+
+    def __init__(self, path: str, lease_seconds: float = INGEST_JOB_LEASE_SECONDS):
+        self.lease_seconds = lease_seconds
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                input TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                nodes TEXT NOT NULL DEFAULT '[]',
+                result TEXT,
+                error TEXT,
+                owner TEXT,
+                lease_until REAL
+            )
+            """
+        )
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "lease_until" not in columns:
+            # Databases from before leases: their jobs have no lease and are claimable.
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN lease_until REAL")
+        self._conn.commit()
+
+    def create(self, kind: str, job_input: Dict[str, Any]) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, status, input, created_at, owner, lease_until) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(job_input), time.time(), BOOT_TOKEN, time.time() + self.lease_seconds),
+            )
+            self._conn.commit()
+        return job_id
+
+    def update(self, job_id: str, **fields: Any) -> None:
+        for key in ("nodes", "result"):
+            if key in fields and fields[key] is not None:
+                fields[key] = json.dumps(fields[key])
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id)
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["input"] = json.loads(job["input"])
+        job["nodes"] = json.loads(job["nodes"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def renew_leases(self) -> None:
+        """Extend the lease on every unfinished job this process owns."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE owner = ? AND status IN ('queued', 'running')",
+                (time.time() + self.lease_seconds, BOOT_TOKEN),
+            )
+            self._conn.commit()
+
+    def claim_orphans(self) -> List[Dict[str, Any]]:
+        """
+        Take over unfinished jobs of other processes whose lease has expired. The
+        claim is a compare-and-swap on owner and lease, so when several workers
+        restart together each job is claimed by exactly one of them.
+        """
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, owner, lease_until FROM jobs WHERE status IN ('queued', 'running') "
+                "AND owner IS NOT ? AND (lease_until IS NULL OR lease_until < ?) ORDER BY created_at",
+                (BOOT_TOKEN, now),
+            ).fetchall()
+        claimed = []
+        for row in rows:
+            with self._lock:
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET owner = ?, lease_until = ?, status = 'queued', started_at = NULL "
+                    "WHERE id = ? AND owner IS ? AND lease_until IS ?",
+                    (BOOT_TOKEN, now + self.lease_seconds, row["id"], row["owner"], row["lease_until"]),
+                )
+                self._conn.commit()
+            if cursor.rowcount == 1:
+                claimed.append(self.get(row["id"]))
+        return claimed
+
+
+class IngestionJobQueue:
+    """
+    Runs the ingestion graph for submitted jobs on a bounded thread pool,
+    recording per-node progress and timing as each node completes.
+    """
+
+    def __init__(self, store: JobStore, max_workers: int, max_pending: int):
+        self.store = store
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def submit(self, kind: str, job_input: Dict[str, Any]) -> str:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise JobQueueFull(f"{self._pending} ingestion jobs already pending")
+            self._pending += 1
+        job_id = self.store.create(kind, job_input)
+        self._start_heartbeat()
+        self._executor.submit(self._run, job_id, job_input)
+        return job_id
+
+    def resume(self) -> int:
+        """Re-queue jobs left queued or running by a process that has exited."""
+        self._start_heartbeat()
+        return self._claim_orphans()
+
+    def _claim_orphans(self) -> int:
+        jobs = self.store.claim_orphans()
+        for job in jobs:
+            with self._lock:
+                self._pending += 1
+            self._executor.submit(self._run, job["id"], job["input"])
+        return len(jobs)
+
+    def _start_heartbeat(self) -> None:
+        with self._lock:
+            if self._heartbeat is not None:
+                return
+            self._heartbeat = threading.Thread(target=self._renew_forever, name="ingest-lease", daemon=True)
+            self._heartbeat.start()
+
+    def _renew_forever(self) -> None:
+        # Renews this process' leases and keeps looking for orphans, since a crashed
+        # process' leases may still have been valid when this one started.
+        interval = max(self.store.lease_seconds / 3, 1.0)
+        while True:
+            time.sleep(interval)
+            try:
+                self.store.renew_leases()
+                resumed = self._claim_orphans()
+                if resumed:
+                    logger.info(f"Resumed {resumed} ingestion jobs whose owner stopped renewing")
+            except Exception:
+                logger.exception("Renewing ingestion job leases failed")
+
+    def _run(self, job_id: str, job_input: Dict[str, Any]) -> None:
+        started = time.time()
+        self.store.update(job_id, status="running", started_at=started, nodes=[])
+        nodes: List[Dict[str, Any]] = []
+        state: Dict[str, Any] = dict(job_input)
+        try:
+            graph = get_ingestion_graph()
+            config = {"configurable": {"thread_id": job_id}}
+            for update in graph.stream(
+                {"input_url": "", "pdf_path": "", **job_input},
+                config=config,
+                stream_mode="updates",
+            ):
+                for node, values in update.items():
+                    values = values or {}
+                    state.update(values)
+                    nodes.append(
+                        {
+                            "node": node,
+                            "seconds": (values.get("node_seconds") or {}).get(node),
+                            "error": values.get("error"),
+                        }
+                    )
+                self.store.update(job_id, nodes=nodes)
+
+            result = {key: state.get(key) for key in RESULT_KEYS}
+            self.store.update(
+                job_id,
+                status="failed" if result["error"] else "succeeded",
+                finished_at=time.time(),
+                # A failed run has no collection to report; its error is enough.
+                result=None if result["error"] else result,
+                error=result["error"],
+            )
+        except Exception as e:
+            logger.exception(f"Ingestion job {job_id} failed")
+            self.store.update(
+                job_id,
+                status="failed",
+                finished_at=time.time(),
+                error=f"{type(e).__name__}: {e}",
+            )
+        finally:
+            pdf_path = job_input.get("pdf_path")
+            if pdf_path and os.path.exists(pdf_path):
+                os.unlink(pdf_path)
+            with self._lock:
+                self._pending -= 1
@@ -1,22 +1,57 @@
-from typing import Dict, Any
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterator, List, Tuple
 import pymupdf
+from app.config import PDF_LOADER_PROCESSES, PDF_PAGES_PER_TASK
 
 
-def load_pdf_content(state: Dict[str, Any]) -> Dict[str, Any]:
+def inspect_pdf(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Open the PDF once to validate it; pages are read later, one at a time."""
     pdf_path = state["pdf_path"]
 
     try:
-        doc = pymupdf.open(pdf_path)
-        all_text = []
-
-        for page_num, page in enumerate(doc):
-            text = page.get_text()
-            if text.strip():
-                all_text.append(f"\n--- Page {page_num + 1} ---\n{text}")
-        doc.close()
-
-        return {"content": "\n".join(all_text).strip()}
+        with pymupdf.open(pdf_path) as doc:
+            return {"page_count": doc.page_count}
 
     except Exception as e:
         # print(f"PDF error: {e}")  
-        return {"content": "", "error": str(e)}
+        return {"error": str(e)}
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    with pymupdf.open(pdf_path) as doc:
+        return [(page_num + 1, doc[page_num].get_text()) for page_num in range(start, stop)]
+
+
+def iter_pdf_pages(pdf_path: str, processes: int = PDF_LOADER_PROCESSES) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (page number, text) for each non-empty page, in order.
+    With processes > 1, page ranges are extracted on a process pool,
+    keeping at most one range per process in flight so memory stays bounded.
+    """
+    if processes <= 1:
+        with pymupdf.open(pdf_path) as doc:
+            for page_num, page in enumerate(doc):
+                text = page.get_text()
+                if text.strip():
+                    yield page_num + 1, text
+        return
+
+    with pymupdf.open(pdf_path) as doc:
+        page_count = doc.page_count
+
+    ranges = (
+        (start, min(start + PDF_PAGES_PER_TASK, page_count))
+        for start in range(0, page_count, PDF_PAGES_PER_TASK)
+    )
+    with ProcessPoolExecutor(
+        max_workers=processes, mp_context=multiprocessing.get_context("spawn")
+    ) as pool:
+        in_flight = deque()
+        for start, stop in ranges:
+            in_flight.append(pool.submit(_extract_page_range, pdf_path, start, stop))
+            if len(in_flight) >= processes:
+                yield from (page for page in in_flight.popleft().result() if page[1].strip())
+        while in_flight:
+            yield from (page for page in in_flight.popleft().result() if page[1].strip())
@@ -0,0 +1,122 @@
+import contextvars
+import functools
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, REGISTRY
+
+STAGE_SECONDS = Histogram(
+    "supportai_stage_seconds",
+    "Time spent in each stage of question answering.",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+NODE_SECONDS = Histogram(
+    "supportai_ingestion_node_seconds",
+    "Time spent in each ingestion graph node.",
+    ["node"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900),
+)
+LLM_TOKENS = Counter(
+    "supportai_llm_tokens_total",
+    "Tokens sent to and generated by the LLM, as reported by Ollama.",
+    ["purpose", "kind"],
+)
+QDRANT_HITS = Histogram(
+    "supportai_qdrant_hits",
+    "Points returned per retrieval query.",
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50),
+)
+ESCALATIONS = Counter(
+    "supportai_escalations_total",
+    "Questions handed to the support team because no answer was found.",
+    ["reason"],
+)
+NOTIFICATIONS = Counter(
+    "supportai_notifications_total",
+    "Unanswered-question notifications by outcome: sent, deduplicated, dropped or failed.",
+    ["outcome"],
+)
+
+# Stage timings of the current request, for the Server-Timing header. The dict is
+# shared by reference with worker threads started from the request's context.
+_request_timings: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.labels(stage=name).observe(elapsed)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def start_request_timings() -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
+
+
+def timed_node(name: str, node: Callable[[Dict[str, Any]], Dict[str, Any]]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Wrap a LangGraph node so its run time is recorded under its node name, and
+    also returned in its update as {"node_seconds": {name: seconds}} for callers
+    that stream the graph.
+    """
+
+    @functools.wraps(node)
+    def run(state: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            update = node(state)
+        finally:
+            seconds = time.perf_counter() - started
+            NODE_SECONDS.labels(node=name).observe(seconds)
+        return {**(update or {}), "node_seconds": {name: round(seconds, 3)}}
+
+    return run
+
+
+def record_llm_usage(message: Any, purpose: str) -> None:
+    usage = getattr(message, "usage_metadata", None)
+    if not usage:
+        return
+    LLM_TOKENS.labels(purpose=purpose, kind="prompt").inc(usage.get("input_tokens", 0))
+    LLM_TOKENS.labels(purpose=purpose, kind="completion").inc(usage.get("output_tokens", 0))
+
+
+class CacheStatsCollector:
+    """Exports the hit/miss counters the caches already keep, read at scrape time."""
+
+    def __init__(self, sources: Dict[str, Callable[[], Dict[str, Any]]]):
+        self.sources = sources
+
+    def collect(self) -> Iterator[Any]:
+        hits = CounterMetricFamily("supportai_cache_hits", "Cache hits.", labels=["cache"])
+        misses = CounterMetricFamily("supportai_cache_misses", "Cache misses.", labels=["cache"])
+        ratio = GaugeMetricFamily("supportai_cache_hit_ratio", "Cache hit ratio since start.", labels=["cache"])
+        for name, source in self.sources.items():
+            stats = source()
+            hits.add_metric([name], stats.get("hits", 0))
+            misses.add_metric([name], stats.get("misses", 0))
+            ratio.add_metric([name], stats.get("hit_ratio", 0.0))
+        yield hits
+        yield misses
+        yield ratio
+
+
+def register_cache_stats(sources: Dict[str, Callable[[], Dict[str, Any]]]) -> None:
+    REGISTRY.register(CacheStatsCollector(sources))
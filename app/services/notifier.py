@@ -18,10 +18,15 @@
 
 
 
+import datetime
+import logging
+import queue
 import smtplib
+import threading
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import datetime
+from typing import Callable, Dict, List, Optional
 from app.config import (
     EMAIL_HOST,
     EMAIL_PORT,
@@ -30,49 +35,244 @@ from app.config import (
     EMAIL_RECIPIENT,
     EMAIL_SENDER_NAME,
     EMAIL_FROM,
+    EMAIL_STARTTLS,
+    EMAIL_TIMEOUT,
+    EMAIL_IDLE_TIMEOUT,
+    NOTIFY_DEDUP_WINDOW,
+    NOTIFY_DIGEST_INTERVAL,
+    NOTIFY_MAX_RETRIES,
+    NOTIFY_RETRY_BACKOFF,
+    NOTIFY_QUEUE_SIZE,
 )
+from app.services.metrics import NOTIFICATIONS
+from app.services.resources import get_notifier
 
-def send_email_notification(
-    question: str,
-    subject_prefix: str = "Unanswered question from Support AI"
-):
-    """
-    Send email notification when no answer is found (using SMTP).
-    Uses credentials from .env (typically Gmail with App Password).
-    """
-    if not all([EMAIL_USERNAME, EMAIL_PASSWORD, EMAIL_RECIPIENT]):
-        print("Email credentials missing → skipping notification")
-        return
+logger = logging.getLogger(__name__)
+
+DEFAULT_SUBJECT_PREFIX = "Unanswered question from Support AI"
+MAX_RETRY_DELAY = 300.0
+
+
+class PendingQuestion:
+    def __init__(self, question: str, subject_prefix: str, asked_at: float):
+        self.question = question
+        self.subject_prefix = subject_prefix
+        self.asked_at = asked_at
+        self.count = 1
+
+
+def _sender() -> str:
+    return f"{EMAIL_SENDER_NAME} <{EMAIL_FROM or EMAIL_USERNAME}>"
 
+
+def _timestamp(moment: float) -> str:
+    return datetime.datetime.fromtimestamp(moment).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def build_message(batch: List[PendingQuestion]) -> MIMEMultipart:
+    """One mail for a single question as before, or a digest listing every question in the batch."""
     msg = MIMEMultipart()
-    msg["From"] = f"{EMAIL_SENDER_NAME} <{EMAIL_FROM or EMAIL_USERNAME}>"
+    msg["From"] = _sender()
     msg["To"] = EMAIL_RECIPIENT
-    msg["Subject"] = f"{subject_prefix}: {question[:70]}…"
-
-    # Email body
-    body = f"""
+    if len(batch) == 1:
+        item = batch[0]
+        msg["Subject"] = f"{item.subject_prefix}: {item.question[:70]}…"
+        repeats = f"\nAsked {item.count} times\n" if item.count > 1 else ""
+        body = f"""
 Unanswered question received:
 
 Question:
-{question}
-
-Time: {datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+{item.question}
+{repeats}
+Time: {_timestamp(item.asked_at)}
 
 This is an automated notification from the Support AI system.
 Please check if this question should be added to the knowledge base.
-    """.strip()
+        """.strip()
+    else:
+        msg["Subject"] = f"{DEFAULT_SUBJECT_PREFIX}: {len(batch)} questions"
+        lines = "\n".join(
+            f"- {item.question}\n  First asked {_timestamp(item.asked_at)}"
+            + (f", {item.count} times" if item.count > 1 else "")
+            + (f" ({item.subject_prefix})" if item.subject_prefix != DEFAULT_SUBJECT_PREFIX else "")
+            for item in batch
+        )
+        body = f"""
+Unanswered questions received:
 
+{lines}
+
+This is an automated notification from the Support AI system.
+Please check if these questions should be added to the knowledge base.
+        """.strip()
     msg.attach(MIMEText(body, "plain", "utf-8"))
+    return msg
 
-    try:
-        # Connect to SMTP server
-        server = smtplib.SMTP(EMAIL_HOST, EMAIL_PORT)
-        server.starttls()  # Enable TLS
+
+def _connect_smtp() -> smtplib.SMTP:
+    server = smtplib.SMTP(EMAIL_HOST, EMAIL_PORT, timeout=EMAIL_TIMEOUT)
+    if EMAIL_STARTTLS:
+        server.starttls()
+    if EMAIL_USERNAME and EMAIL_PASSWORD:
         server.login(EMAIL_USERNAME, EMAIL_PASSWORD)
-        server.send_message(msg)
-        server.quit()
+    return server
 
-        print(f"[EMAIL SENT] Notification sent for question: {question[:50]}…")
 
-    except Exception as e:
-        print(f"[EMAIL FAILED] {type(e).__name__}: {str(e)}")
\ No newline at end of file
+class NotificationDispatcher:
+    """
+    Sends unanswered-question mails from a background thread, so escalating costs
+    a request only a queue put. Identical questions within `dedup_window` seconds
+    are counted rather than re-sent, questions arriving within `digest_interval`
+    of each other go out as one digest, and failed sends are retried with
+    exponential backoff over one SMTP connection that is kept open between mails.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], smtplib.SMTP] = _connect_smtp,
+        dedup_window: float = NOTIFY_DEDUP_WINDOW,
+        digest_interval: float = NOTIFY_DIGEST_INTERVAL,
+        max_retries: int = NOTIFY_MAX_RETRIES,
+        retry_backoff: float = NOTIFY_RETRY_BACKOFF,
+        idle_timeout: float = EMAIL_IDLE_TIMEOUT,
+        queue_size: int = NOTIFY_QUEUE_SIZE,
+    ):
+        self.connect = connect
+        self.dedup_window = dedup_window
+        self.digest_interval = digest_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.idle_timeout = idle_timeout
+        self._queue: "queue.Queue[PendingQuestion]" = queue.Queue(maxsize=max(queue_size, 1))
+        self._recent: Dict[str, PendingQuestion] = {}
+        self._recent_lock = threading.Lock()
+        self._smtp: Optional[smtplib.SMTP] = None
+        self._last_used = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    @staticmethod
+    def _key(question: str) -> str:
+        return " ".join(question.split()).lower()
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="notification-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Send what is still queued, once, and close the SMTP connection."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def notify(self, question: str, subject_prefix: str = DEFAULT_SUBJECT_PREFIX) -> None:
+        now = time.time()
+        key = self._key(question)
+        with self._recent_lock:
+            recent = self._recent.get(key)
+            if recent is not None and now - recent.asked_at < self.dedup_window:
+                recent.count += 1
+                NOTIFICATIONS.labels(outcome="deduplicated").inc()
+                return
+            item = PendingQuestion(question, subject_prefix, now)
+            self._recent[key] = item
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            # Forget the dropped item so the next ask is queued rather than
+            # counted against a notification that was never sent.
+            with self._recent_lock:
+                if self._recent.get(key) is item:
+                    del self._recent[key]
+            NOTIFICATIONS.labels(outcome="dropped").inc()
+            logger.warning(f"Notification queue full, dropping: {question[:50]}")
+            return
+        self.start()
+
+    def _prune_recent(self, now: float) -> None:
+        with self._recent_lock:
+            self._recent = {
+                key: item for key, item in self._recent.items() if now - item.asked_at < self.dedup_window
+            }
+
+    def _close_smtp(self) -> None:
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            pass
+        self._smtp = None
+
+    def _send(self, batch: List[PendingQuestion], retries: int) -> None:
+        message = build_message(batch)
+        for attempt in range(retries + 1):
+            try:
+                if self._smtp is None:
+                    self._smtp = self.connect()
+                self._smtp.send_message(message)
+                self._last_used = time.monotonic()
+                NOTIFICATIONS.labels(outcome="sent").inc(len(batch))
+                logger.info(f"Notification sent for {len(batch)} question(s)")
+                return
+            except Exception as e:
+                # The connection may be half-broken; start afresh on the next attempt.
+                self._close_smtp()
+                if attempt == retries:
+                    NOTIFICATIONS.labels(outcome="failed").inc(len(batch))
+                    logger.error(
+                        f"Notification failed after {attempt + 1} attempts ({type(e).__name__}: {e}); "
+                        f"questions: {[item.question[:50] for item in batch]}"
+                    )
+                    return
+                delay = min(self.retry_backoff * 2 ** attempt, MAX_RETRY_DELAY)
+                logger.warning(f"Notification send failed ({type(e).__name__}: {e}), retrying in {delay:.1f}s")
+                if self._stop.wait(delay):
+                    # Shutting down: one last attempt instead of the rest of the schedule.
+                    retries = attempt + 1
+
+    def _drain(self) -> List[PendingQuestion]:
+        batch: List[PendingQuestion] = []
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                return batch
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                first = self._queue.get(timeout=1.0)
+            except queue.Empty:
+                if self._smtp is not None and time.monotonic() - self._last_used > self.idle_timeout:
+                    self._close_smtp()
+                self._prune_recent(time.time())
+                continue
+            # Give a burst time to arrive so it goes out as one digest.
+            self._stop.wait(self.digest_interval)
+            self._send([first] + self._drain(), self.max_retries)
+        batch = self._drain()
+        if batch:
+            self._send(batch, 0)
+        self._close_smtp()
+
+
+def notifications_enabled() -> bool:
+    return bool(EMAIL_RECIPIENT and (EMAIL_FROM or EMAIL_USERNAME))
+
+
+def notify_unanswered(question: str, subject_prefix: str = DEFAULT_SUBJECT_PREFIX) -> None:
+    """
+    Queue a notification about an unanswered question; returns immediately and is
+    safe to call from request handlers, worker threads and the event loop alike.
+    """
+    if not notifications_enabled():
+        logger.info("Email settings missing → skipping notification")
+        return
+    get_notifier().notify(question, subject_prefix)
@@ -0,0 +1,159 @@
+"""
+Sentence embeddings with ONNX Runtime instead of PyTorch.
+
+The model is exported once (optionally with dynamic int8 quantization), after
+which serving needs only onnxruntime and tokenizers:
+
+    python -m app.services.onnx_embeddings export --quantize
+    python -m app.services.onnx_embeddings parity --int8
+
+Exporting needs `pip install optimum[onnxruntime]` and torch; serving does not.
+"""
+import argparse
+import os
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from app.config import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_MAX_LENGTH,
+    EMBEDDING_MODEL,
+    EMBEDDING_PARITY_MIN_COSINE,
+    EMBEDDING_THREADS,
+    ONNX_MODEL_DIR,
+    ONNX_QUANTIZED,
+)
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_QUANTIZED_MODEL_FILE = "model_quantized.onnx"
+
+# Short support-style texts covering prose, codes and mixed languages; used to
+# check that an exported model still agrees with the PyTorch one.
+PARITY_FIXTURES = [
+    "How do I reset my password?",
+    "Our support team is available Monday to Friday, 9am to 5pm CET.",
+    "Error E-4012: payment method declined by the issuing bank.",
+    "The Pro plan includes 10 seats, SSO and priority support.",
+    "Refunds are issued within 14 days of cancellation.",
+    "SKU ABX-220-BLK ships from the Rotterdam warehouse.",
+    "Contact us at support@example.com or call +1 555 0100.",
+    "Wie kann ich meine Rechnung herunterladen?",
+    "API rate limits: 600 requests per minute per key.",
+    "",
+]
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Mean-pooled, L2-normalised sentence embeddings from an exported transformer,
+    matching sentence-transformers' output for models such as all-MiniLM-L6-v2.
+    """
+
+    def __init__(
+        self,
+        model_dir: str = ONNX_MODEL_DIR,
+        quantized: bool = ONNX_QUANTIZED,
+        threads: int = EMBEDDING_THREADS,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        max_length: int = EMBEDDING_MAX_LENGTH,
+    ):
+        import onnxruntime
+        from tokenizers import Tokenizer
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+
+        model_file = ONNX_QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        self._session = onnxruntime.InferenceSession(
+            os.path.join(model_dir, model_file),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._input_names = {i.name for i in self._session.get_inputs()}
+
+        self._tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self._tokenizer.enable_truncation(max_length=max_length)
+        self._tokenizer.enable_padding()
+        self.batch_size = batch_size
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.asarray([e.type_ids for e in encodings], dtype=np.int64)
+
+        token_embeddings = self._session.run(None, feeds)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = [
+            self._embed_batch(texts[start : start + self.batch_size])
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        return np.concatenate(vectors).tolist() if vectors else []
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed_batch([text])[0].tolist()
+
+
+def export_onnx_model(model_name: str, output_dir: str, quantize: bool) -> None:
+    """Export a Hugging Face model to ONNX, plus a dynamically int8-quantized copy if asked."""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+    if quantize:
+        quantizer = ORTQuantizer.from_pretrained(output_dir, file_name=ONNX_MODEL_FILE)
+        quantizer.quantize(
+            save_dir=output_dir,
+            quantization_config=AutoQuantizationConfig.avx2(is_static=False, per_channel=False),
+        )
+
+
+def parity_cosines(candidate: Embeddings, reference: Embeddings, texts: List[str]) -> np.ndarray:
+    """Cosine similarity between the two backends' embeddings of each text."""
+    a = np.asarray(candidate.embed_documents(texts), dtype=np.float32)
+    b = np.asarray(reference.embed_documents(texts), dtype=np.float32)
+    a /= np.linalg.norm(a, axis=1, keepdims=True) + 1e-12
+    b /= np.linalg.norm(b, axis=1, keepdims=True) + 1e-12
+    return (a * b).sum(axis=1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Export EMBEDDING_MODEL to ONNX_MODEL_DIR")
+    export.add_argument("--quantize", action="store_true", help="Also write an int8 model")
+    parity = commands.add_parser("parity", help="Compare the ONNX model with the PyTorch one")
+    parity.add_argument("--int8", action="store_true", help="Check the int8 model even if ONNX_QUANTIZED is off")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        export_onnx_model(EMBEDDING_MODEL, ONNX_MODEL_DIR, args.quantize)
+        print(f"Exported {EMBEDDING_MODEL} to {ONNX_MODEL_DIR}")
+        return
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    reference = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL, model_kwargs={"device": "cpu"})
+    cosines = parity_cosines(OnnxEmbeddings(quantized=ONNX_QUANTIZED or args.int8), reference, PARITY_FIXTURES)
+    print(f"cosine min {cosines.min():.4f}, mean {cosines.mean():.4f} over {len(cosines)} texts")
+    if cosines.min() < EMBEDDING_PARITY_MIN_COSINE:
+        raise SystemExit(f"Parity check failed: minimum cosine below {EMBEDDING_PARITY_MIN_COSINE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,49 @@
+import asyncio
+import hashlib
+import json
+import logging
 import re
-from typing import List, Dict, Any
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, AsyncIterator, Optional, Tuple
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage, BaseMessage
-from langchain_ollama import ChatOllama
-from langchain_qdrant import QdrantVectorStore
-from qdrant_client import QdrantClient
 from app.config import (
-    QDRANT_HOST,
-    QDRANT_PORT,
-    LLM_MODEL,
-    LLM_TEMPERATURE,
-    EMBEDDING_MODEL,
+    LLM_MAX_CONCURRENCY,
+    RERANKER,
+    REWRITE_FAST_PATH,
+    REWRITE_CACHE_SIZE,
+    REWRITE_CACHE_TTL,
+    REWRITE_HISTORY_MESSAGES,
+    FAQ_ENABLED,
+    SEMANTIC_CACHE_ENABLED,
 )
+from app.services.cache import TTLCache
+from app.services.context_builder import estimate_tokens, pack_context, trim_history
+from app.services.hybrid import (
+    DENSE_VECTOR,
+    ais_hybrid_collection,
+    as_query_request,
+    dense_query_kwargs,
+    hybrid_query_kwargs,
+    is_hybrid_collection,
+)
+from app.services.metrics import ESCALATIONS, QDRANT_HITS, record_llm_usage, stage
 # from app.services.notifier import send_push_notification, 
-from app.services.notifier import send_email_notification
-from langchain_huggingface import HuggingFaceEmbeddings
-
-embeddings = HuggingFaceEmbeddings(
-    model_name=EMBEDDING_MODEL, model_kwargs={"device": "cpu"}
+from app.services.notifier import notify_unanswered
+from app.services.resources import (
+    get_async_qdrant_client,
+    get_embeddings,
+    get_faq_index,
+    get_llm,
+    get_qdrant_client,
+    get_semantic_cache,
 )
-llm = ChatOllama(model=LLM_MODEL, temperature=0.2)
-client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+from app.services.reranker import LOCAL_RERANKERS
+from app.services.tenancy import physical_collection, tenant_filter
+
+logger = logging.getLogger(__name__)
+
+QA_TEMPERATURE = 0.2
 RETRIEVAL_K = 5
 NO_ANSWER_MESSAGE = "No answer found our team will reach out to you."
 
@@ -46,7 +70,66 @@ Context:
 """
 
 
-def rewrite_query(question: str, history: List[Dict[str, str]]) -> str:
+# Words that usually point back into the conversation ("how much does it cost?"),
+# meaning the question cannot be searched on its own.
+REFERENTIAL_WORDS = {
+    "it", "its", "that", "this", "these", "those", "they", "them", "their",
+    "he", "she", "him", "her", "there", "one", "ones", "same", "above",
+    "previous", "earlier", "else", "former", "latter",
+}
+MIN_STANDALONE_WORDS = 3
+
+rewrite_cache = TTLCache(maxsize=REWRITE_CACHE_SIZE, ttl=REWRITE_CACHE_TTL)
+rewrite_stats = {"fast_path": 0}
+
+_llm_semaphores: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _llm_slot() -> asyncio.Semaphore:
+    """Per-event-loop limiter on in-flight LLM calls from the async pipeline."""
+    loop = asyncio.get_running_loop()
+    semaphore = _llm_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        _llm_semaphores[loop] = semaphore
+    return semaphore
+
+
+async def _ainvoke_llm(messages: List[BaseMessage], purpose: str) -> str:
+    async with _llm_slot():
+        response = await get_llm(QA_TEMPERATURE).ainvoke(messages)
+    record_llm_usage(response, purpose)
+    return response.content.strip()
+
+
+def _recent_history(history: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    return history[-REWRITE_HISTORY_MESSAGES:] if REWRITE_HISTORY_MESSAGES > 0 else []
+
+
+def needs_rewrite(question: str, history: List[Dict[str, str]]) -> bool:
+    """
+    Cheap check for whether the LLM rewrite can change retrieval at all: first-turn
+    questions and self-contained follow-ups are searched as asked.
+    """
+    if not history:
+        return False
+    words = re.findall(r"[a-z']+", question.lower())
+    if len(words) < MIN_STANDALONE_WORDS:
+        return True
+    return any(word in REFERENTIAL_WORDS for word in words)
+
+
+def _rewrite_cache_key(question: str, history: List[Dict[str, str]]) -> tuple:
+    digest = hashlib.sha1(
+        json.dumps(_recent_history(history), sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    return (" ".join(question.split()).lower(), digest)
+
+
+def _rewrite_messages(question: str, history: List[Dict[str, str]]) -> List[BaseMessage]:
+    history = _recent_history(history)
     formatted_history = "\n".join(
         (
             f"User: {item['content']}"
@@ -85,14 +168,52 @@ User question:
 Rewritten query:
 """
 
-    messages = [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
+    return [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
 
-    response = llm.invoke(messages)
+
+def rewrite_query(question: str, history: List[Dict[str, str]]) -> str:
+    response = get_llm(QA_TEMPERATURE).invoke(_rewrite_messages(question, history))
+    record_llm_usage(response, "rewrite")
     rewritten_query = response.content.strip()
     return rewritten_query
 
 
-def rerank_chunks(question: str, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+async def arewrite_query(question: str, history: List[Dict[str, str]]) -> str:
+    return await _ainvoke_llm(_rewrite_messages(question, history), "rewrite")
+
+
+def prepare_query(question: str, history: List[Dict[str, str]]) -> str:
+    """Search query for a question: the question itself, a cached rewrite, or a fresh one."""
+    if REWRITE_FAST_PATH and not needs_rewrite(question, history):
+        rewrite_stats["fast_path"] += 1
+        return question
+    key = _rewrite_cache_key(question, history)
+    cached = rewrite_cache.get(key)
+    if cached is not None:
+        return cached
+    rewritten_query = rewrite_query(question, history) or question
+    rewrite_cache.set(key, rewritten_query)
+    return rewritten_query
+
+
+async def aprepare_query(question: str, history: List[Dict[str, str]]) -> str:
+    if REWRITE_FAST_PATH and not needs_rewrite(question, history):
+        rewrite_stats["fast_path"] += 1
+        return question
+    key = _rewrite_cache_key(question, history)
+    cached = rewrite_cache.get(key)
+    if cached is not None:
+        return cached
+    rewritten_query = await arewrite_query(question, history) or question
+    rewrite_cache.set(key, rewritten_query)
+    return rewritten_query
+
+
+def rewrite_cache_stats() -> Dict[str, Any]:
+    return {**rewrite_cache.stats(), "fast_path": rewrite_stats["fast_path"]}
+
+
+def _rerank_messages(question: str, chunks: List[Dict[str, Any]]) -> List[BaseMessage]:
     system_prompt = """
 You are a document re-ranker.
 You are provided with a question and a list of relevant chunks of text from a query of a knowledge base.
@@ -107,10 +228,10 @@ Reply only with the list of ranked chunk, nothing else. Include all the chunk id
         user_prompt += f"# CHUNK ID: {index}\n\n{chunk['content']}\n\n"
     user_prompt += "Reply only with the list of ranked chunk ids, nothing else."
 
-    messages = [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
+    return [SystemMessage(content=system_prompt), HumanMessage(content=user_prompt)]
 
-    response = llm.invoke(messages)
-    data = response.content.strip()
+
+def _apply_rerank_reply(data: str, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     # print("reranker response:", data)  
 
     matches = re.findall(r"(?:#\s*)?CHUNK\s+ID[:\s-]*(\d+)", data, flags=re.IGNORECASE)
@@ -133,31 +254,166 @@ Reply only with the list of ranked chunk, nothing else. Include all the chunk id
     return [chunks[i - 1] for i in ranked_ids]
 
 
-def fetch_context_unranked(question: str, collection_name: str) -> List[Dict[str, Any]]:
-    vectorstore = QdrantVectorStore(
-        client=client,
-        collection_name=collection_name,
-        embedding=embeddings,
-    )
-    retriever = vectorstore.as_retriever()
-    documents = retriever.invoke(question)
-    # print(documents)      
-    # print(len(documents))  
+def rerank_chunks(question: str, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    response = get_llm(QA_TEMPERATURE).invoke(_rerank_messages(question, chunks))
+    record_llm_usage(response, "rerank")
+    return _apply_rerank_reply(response.content.strip(), chunks)
+
+
+async def arerank_chunks(question: str, chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    data = await _ainvoke_llm(_rerank_messages(question, chunks), "rerank")
+    return _apply_rerank_reply(data, chunks)
+
+
+def _points_to_chunks(points: List[Any], collection_name: str) -> List[Dict[str, Any]]:
     chunks = []
-    for doc in documents[:RETRIEVAL_K]:
-        chunks.append({"content": doc.page_content, "metadata": doc.metadata})
+    for point in points:
+        payload = point.payload or {}
+        metadata = dict(payload.get("metadata") or {})
+        metadata["_id"] = point.id
+        metadata["_collection_name"] = collection_name
+        vector = point.vector
+        if isinstance(vector, dict):
+            vector = vector.get(DENSE_VECTOR)
+        chunks.append(
+            {
+                "content": payload.get("page_content", ""),
+                "metadata": metadata,
+                "vector": vector,
+            }
+        )
     return chunks
 
 
-def fetch_context(question: str, collection_name: str) -> List[Dict[str, Any]]:
-    chunks = fetch_context_unranked(question, collection_name)
+def search_chunks(
+    question: str, query_vector: List[float], collection_name: str
+) -> List[Dict[str, Any]]:
+    physical = physical_collection(collection_name)
+    query_filter = tenant_filter(collection_name)
+    if is_hybrid_collection(physical):
+        query = hybrid_query_kwargs(question, query_vector, RETRIEVAL_K, query_filter)
+    else:
+        query = dense_query_kwargs(query_vector, RETRIEVAL_K, query_filter)
+    response = get_qdrant_client().query_points(
+        collection_name=physical, with_payload=True, **query
+    )
+    # print(response.points)
+    QDRANT_HITS.observe(len(response.points))
+    return _points_to_chunks(response.points, collection_name)
+
+
+async def asearch_chunks(
+    question: str, query_vector: List[float], collection_name: str
+) -> List[Dict[str, Any]]:
+    physical = physical_collection(collection_name)
+    query_filter = tenant_filter(collection_name)
+    if await ais_hybrid_collection(physical):
+        query = hybrid_query_kwargs(question, query_vector, RETRIEVAL_K, query_filter)
+    else:
+        query = dense_query_kwargs(query_vector, RETRIEVAL_K, query_filter)
+    response = await get_async_qdrant_client().query_points(
+        collection_name=physical, with_payload=True, **query
+    )
+    QDRANT_HITS.observe(len(response.points))
+    return _points_to_chunks(response.points, collection_name)
+
+
+def _batch_requests(
+    questions: List[str], query_vectors: List[List[float]], collection_name: str, hybrid: bool
+) -> List[Any]:
+    query_filter = tenant_filter(collection_name)
+    return [
+        as_query_request(
+            hybrid_query_kwargs(question, vector, RETRIEVAL_K, query_filter)
+            if hybrid
+            else dense_query_kwargs(vector, RETRIEVAL_K, query_filter)
+        )
+        for question, vector in zip(questions, query_vectors)
+    ]
+
+
+def search_chunks_batch(
+    questions: List[str], query_vectors: List[List[float]], collection_name: str
+) -> List[List[Dict[str, Any]]]:
+    """search_chunks for many queries in a single Qdrant round trip; results follow the input order."""
+    if not questions:
+        return []
+    physical = physical_collection(collection_name)
+    requests = _batch_requests(questions, query_vectors, collection_name, is_hybrid_collection(physical))
+    responses = get_qdrant_client().query_batch_points(collection_name=physical, requests=requests)
+    for response in responses:
+        QDRANT_HITS.observe(len(response.points))
+    return [_points_to_chunks(response.points, collection_name) for response in responses]
+
+
+async def asearch_chunks_batch(
+    questions: List[str], query_vectors: List[List[float]], collection_name: str
+) -> List[List[Dict[str, Any]]]:
+    if not questions:
+        return []
+    physical = physical_collection(collection_name)
+    requests = _batch_requests(questions, query_vectors, collection_name, await ais_hybrid_collection(physical))
+    responses = await get_async_qdrant_client().query_batch_points(collection_name=physical, requests=requests)
+    for response in responses:
+        QDRANT_HITS.observe(len(response.points))
+    return [_points_to_chunks(response.points, collection_name) for response in responses]
+
+
+def _rerank(
+    strategy: str, question: str, chunks: List[Dict[str, Any]], query_vector: List[float]
+) -> List[Dict[str, Any]]:
+    if strategy == "llm":
+        return rerank_chunks(question, chunks)
+    return LOCAL_RERANKERS[strategy](question, chunks, query_vector)
+
+
+async def _arerank(
+    strategy: str, question: str, chunks: List[Dict[str, Any]], query_vector: List[float]
+) -> List[Dict[str, Any]]:
+    if strategy == "llm":
+        return await arerank_chunks(question, chunks)
+    return await asyncio.to_thread(LOCAL_RERANKERS[strategy], question, chunks, query_vector)
+
+
+def fetch_context(
+    question: str,
+    collection_name: str,
+    reranker: Optional[str] = None,
+    query_vector: Optional[List[float]] = None,
+) -> List[Dict[str, Any]]:
+    strategy = reranker or RERANKER
+    if query_vector is None:
+        with stage("embed"):
+            query_vector = get_embeddings().embed_query(question)
+    with stage("retrieve"):
+        chunks = search_chunks(question, query_vector, collection_name)
     # print("chunks", chunks)  
-    return rerank_chunks(question, chunks)
+    with stage("rerank"):
+        return _rerank(strategy, question, chunks, query_vector)
+
+
+async def afetch_context(
+    question: str,
+    collection_name: str,
+    reranker: Optional[str] = None,
+    query_vector: Optional[List[float]] = None,
+) -> List[Dict[str, Any]]:
+    strategy = reranker or RERANKER
+    if query_vector is None:
+        with stage("embed"):
+            query_vector = await asyncio.to_thread(get_embeddings().embed_query, question)
+    with stage("retrieve"):
+        chunks = await asearch_chunks(question, query_vector, collection_name)
+    with stage("rerank"):
+        return await _arerank(strategy, question, chunks, query_vector)
 
 
 def make_rag_messages(
     question: str, history: List[Dict[str, str]], chunks: List[Dict[str, Any]]
 ) -> List[BaseMessage]:
+    # Chunks arrive best first; packing keeps that order and drops what does not fit.
+    chunks = pack_context(chunks)
+    history = trim_history(history)
     context = "\n\n".join(
         f"Extract from {chunk['metadata'].get('_collection_name', 'unknown')} (ID: {chunk['metadata'].get('_id', 'unknown')}):\n{chunk['content']}"
         for chunk in chunks
@@ -180,29 +436,281 @@ def make_rag_messages(
         elif m["role"] == "assistant":
             messages.append(AIMessage(content=m["content"]))
 
+    prompt_tokens = sum(estimate_tokens(m["content"]) for m in dict_messages)
+    logger.info(
+        f"RAG prompt: ~{prompt_tokens} tokens ({len(chunks)} chunks, {len(history)} history messages)"
+    )
     return messages
 
 
+def _uses_shortcuts(history: List[Dict[str, str]]) -> bool:
+    # Answers to follow-ups depend on the conversation, so only first turns are
+    # matched against the FAQ index and cached.
+    return (FAQ_ENABLED or SEMANTIC_CACHE_ENABLED) and not history
+
+
+def _shortcut_answer(collection_name: str, question_vector: List[float]) -> Optional[str]:
+    """An answer from the collection's FAQ index or the semantic cache, without retrieval."""
+    if FAQ_ENABLED:
+        with stage("faq"):
+            match = get_faq_index().lookup(collection_name, question_vector)
+        if match:
+            return match["answer"]
+    if SEMANTIC_CACHE_ENABLED:
+        with stage("semantic_cache"):
+            cached = get_semantic_cache().lookup(collection_name, question_vector)
+        if cached:
+            return cached["answer"]
+    return None
+
+
+def _cache_answer(
+    collection_name: str,
+    question_vector: Optional[List[float]],
+    answer: str,
+    chunks: List[Dict[str, Any]],
+) -> None:
+    if not SEMANTIC_CACHE_ENABLED or question_vector is None or answer == NO_ANSWER_MESSAGE:
+        return
+    get_semantic_cache().store(
+        collection_name,
+        question_vector,
+        answer,
+        [chunk["metadata"].get("_id") for chunk in chunks],
+    )
+
+
 def answer_question(
-    question: str, history: List[Dict[str, str]], collection_name: str
+    question: str,
+    history: List[Dict[str, str]],
+    collection_name: str,
+    reranker: Optional[str] = None,
 ) -> str:
-    rewritten_query = rewrite_query(question, history)
+    question_vector = None
+    if _uses_shortcuts(history):
+        with stage("embed"):
+            question_vector = get_embeddings().embed_query(question)
+        shortcut = _shortcut_answer(collection_name, question_vector)
+        if shortcut is not None:
+            return shortcut
+
+    with stage("rewrite"):
+        rewritten_query = prepare_query(question, history)
     # print("Rewritten query:", rewritten_query)  
 
-    chunks = fetch_context(rewritten_query, collection_name)
+    query_vector = question_vector if rewritten_query == question else None
+    chunks = fetch_context(rewritten_query, collection_name, reranker, query_vector)
 
     if not chunks:
         # send_push_notification(question)
-        send_email_notification(question, "No relevant chunks found")
+        ESCALATIONS.labels(reason="no_chunks").inc()
+        notify_unanswered(question, "No relevant chunks found")
         return NO_ANSWER_MESSAGE
 
     messages = make_rag_messages(question, history, chunks)
 
-    response = llm.invoke(messages)
+    with stage("generate"):
+        response = get_llm(QA_TEMPERATURE).invoke(messages)
+    record_llm_usage(response, "answer")
 
     answer = response.content.strip()
 
     if answer == NO_ANSWER_MESSAGE:
-        send_email_notification(question)
+        ESCALATIONS.labels(reason="no_answer").inc()
+        notify_unanswered(question)
 
+    _cache_answer(collection_name, question_vector, answer, chunks)
     return answer
+
+
+async def _alookup_cached_answer(
+    question: str, history: List[Dict[str, str]], collection_name: str
+) -> tuple:
+    """Returns (question vector or None, FAQ or cached answer or None)."""
+    if not _uses_shortcuts(history):
+        return None, None
+    with stage("embed"):
+        question_vector = await asyncio.to_thread(get_embeddings().embed_query, question)
+    return question_vector, await asyncio.to_thread(_shortcut_answer, collection_name, question_vector)
+
+
+async def aanswer_question(
+    question: str,
+    history: List[Dict[str, str]],
+    collection_name: str,
+    reranker: Optional[str] = None,
+) -> str:
+    """Async twin of answer_question; LLM calls share a per-worker concurrency limit."""
+    question_vector, cached_answer = await _alookup_cached_answer(
+        question, history, collection_name
+    )
+    if cached_answer is not None:
+        return cached_answer
+
+    with stage("rewrite"):
+        rewritten_query = await aprepare_query(question, history)
+
+    query_vector = question_vector if rewritten_query == question else None
+    chunks = await afetch_context(rewritten_query, collection_name, reranker, query_vector)
+
+    if not chunks:
+        ESCALATIONS.labels(reason="no_chunks").inc()
+        notify_unanswered(question, "No relevant chunks found")
+        return NO_ANSWER_MESSAGE
+
+    with stage("generate"):
+        answer = await _ainvoke_llm(make_rag_messages(question, history, chunks), "answer")
+
+    if answer == NO_ANSWER_MESSAGE:
+        ESCALATIONS.labels(reason="no_answer").inc()
+        notify_unanswered(question)
+
+    _cache_answer(collection_name, question_vector, answer, chunks)
+    return answer
+
+
+async def astream_answer(
+    question: str,
+    history: List[Dict[str, str]],
+    collection_name: str,
+    reranker: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """
+    Same pipeline as aanswer_question, but yields answer tokens as Ollama produces them.
+    The no-answer check and escalation run once the stream has finished.
+    """
+    question_vector, cached_answer = await _alookup_cached_answer(
+        question, history, collection_name
+    )
+    if cached_answer is not None:
+        yield cached_answer
+        return
+
+    with stage("rewrite"):
+        rewritten_query = await aprepare_query(question, history)
+
+    query_vector = question_vector if rewritten_query == question else None
+    chunks = await afetch_context(rewritten_query, collection_name, reranker, query_vector)
+
+    if not chunks:
+        ESCALATIONS.labels(reason="no_chunks").inc()
+        notify_unanswered(question, "No relevant chunks found")
+        yield NO_ANSWER_MESSAGE
+        return
+
+    messages = make_rag_messages(question, history, chunks)
+    parts = []
+    with stage("generate"):
+        async with _llm_slot():
+            async for message_chunk in get_llm(QA_TEMPERATURE).astream(messages):
+                # Ollama reports token usage on the final chunk.
+                record_llm_usage(message_chunk, "answer")
+                if message_chunk.content:
+                    parts.append(message_chunk.content)
+                    yield message_chunk.content
+
+    answer = "".join(parts).strip()
+    if answer == NO_ANSWER_MESSAGE:
+        ESCALATIONS.labels(reason="no_answer").inc()
+        notify_unanswered(question)
+
+    _cache_answer(collection_name, question_vector, answer, chunks)
+
+
+async def aanswer_batch(
+    items: List[Tuple[str, List[Dict[str, str]]]],
+    collection_name: str,
+    reranker: Optional[str] = None,
+) -> List[str]:
+    """
+    Answers (question, history) pairs against one collection, in order, sharing work
+    between them: every query is embedded in one call, identical queries are
+    retrieved and re-ranked once, all retrievals go to Qdrant in one batch, and
+    identical prompts are generated once. Generation runs concurrently within the
+    per-worker LLM limit.
+    """
+    strategy = reranker or RERANKER
+    answers: List[Optional[str]] = [None] * len(items)
+
+    with stage("rewrite"):
+        queries = await asyncio.gather(*(aprepare_query(question, history) for question, history in items))
+    first_turn = [index for index, (_, history) in enumerate(items) if _uses_shortcuts(history)]
+    texts = list(dict.fromkeys([items[index][0] for index in first_turn] + list(queries)))
+    with stage("embed"):
+        vectors = dict(zip(texts, await asyncio.to_thread(get_embeddings().embed_documents, texts)))
+
+    shortcuts = await asyncio.to_thread(
+        lambda: [_shortcut_answer(collection_name, vectors[items[index][0]]) for index in first_turn]
+    )
+    for index, shortcut in zip(first_turn, shortcuts):
+        answers[index] = shortcut
+
+    pending = [index for index, answer in enumerate(answers) if answer is None]
+    unique_queries = list(dict.fromkeys(queries[index] for index in pending))
+    with stage("retrieve"):
+        retrieved = await asearch_chunks_batch(
+            unique_queries, [vectors[query] for query in unique_queries], collection_name
+        )
+    with stage("rerank"):
+        ranked = await asyncio.gather(
+            *(_arerank(strategy, query, chunks, vectors[query]) for query, chunks in zip(unique_queries, retrieved))
+        )
+    contexts = dict(zip(unique_queries, ranked))
+
+    async def generate(question: str, history: List[Dict[str, str]], chunks: List[Dict[str, Any]]) -> str:
+        if not chunks:
+            ESCALATIONS.labels(reason="no_chunks").inc()
+            notify_unanswered(question, "No relevant chunks found")
+            return NO_ANSWER_MESSAGE
+        answer = await _ainvoke_llm(make_rag_messages(question, history, chunks), "answer")
+        if answer == NO_ANSWER_MESSAGE:
+            ESCALATIONS.labels(reason="no_answer").inc()
+            notify_unanswered(question)
+        return answer
+
+    groups: Dict[tuple, List[int]] = {}
+    for index in pending:
+        question, history = items[index]
+        groups.setdefault((question, json.dumps(history, sort_keys=True), queries[index]), []).append(index)
+    with stage("generate"):
+        generated = await asyncio.gather(
+            *(generate(items[indices[0]][0], items[indices[0]][1], contexts[key[2]]) for key, indices in groups.items())
+        )
+
+    for (key, indices), answer in zip(groups.items(), generated):
+        for index in indices:
+            answers[index] = answer
+        question, history = items[indices[0]]
+        if _uses_shortcuts(history):
+            _cache_answer(collection_name, vectors[question], answer, contexts[key[2]])
+    return answers
+
+
+def precompute_answers(questions: List[str], collection_name: str) -> Dict[str, str]:
+    """
+    Answers to the questions the site analysis suggested, generated once at ingest
+    time. Retrieval is batched like /ask/batch and up to LLM_MAX_CONCURRENCY
+    answers are generated at once; questions the collection cannot answer are
+    left out, and nothing is escalated.
+    """
+    if not questions:
+        return {}
+    query_vectors = get_embeddings().embed_documents(questions)
+    retrieved = search_chunks_batch(questions, query_vectors, collection_name)
+
+    def generate(item: Tuple[str, List[float], List[Dict[str, Any]]]) -> Optional[str]:
+        question, query_vector, chunks = item
+        if not chunks:
+            return None
+        chunks = _rerank(RERANKER, question, chunks, query_vector)
+        response = get_llm(QA_TEMPERATURE).invoke(make_rag_messages(question, [], chunks))
+        record_llm_usage(response, "faq_precompute")
+        return response.content.strip()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(LLM_MAX_CONCURRENCY, len(questions)))) as pool:
+        generated = list(pool.map(generate, zip(questions, query_vectors, retrieved)))
+    return {
+        question: answer
+        for question, answer in zip(questions, generated)
+        if answer and answer != NO_ANSWER_MESSAGE
+    }
@@ -0,0 +1,71 @@
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.config import RERANK_MMR_LAMBDA
+from app.services.resources import get_cross_encoder
+
+Reranker = Callable[[str, List[Dict[str, Any]], Optional[List[float]]], List[Dict[str, Any]]]
+
+
+def mmr_rerank(
+    question: str, chunks: List[Dict[str, Any]], query_vector: Optional[List[float]]
+) -> List[Dict[str, Any]]:
+    """
+    Maximal marginal relevance over the vectors Qdrant already returned, penalising
+    chunks that repeat earlier picks. Relevance is half cosine similarity to the
+    query and half the retrieval rank (RRF-fused dense + BM25 on hybrid
+    collections, mapped onto the same cosine range), so exact-term matches keep
+    their weight instead of being re-sorted by the dense signal alone.
+    """
+    if query_vector is None or len(chunks) < 2 or any(c.get("vector") is None for c in chunks):
+        return chunks
+
+    vectors = np.asarray([chunk["vector"] for chunk in chunks], dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12
+    query = np.asarray(query_vector, dtype=np.float32)
+    query /= np.linalg.norm(query) + 1e-12
+
+    cosine = vectors @ query
+    rank = np.linspace(cosine.max(), cosine.min(), len(chunks), dtype=np.float32)
+    relevance = (cosine + rank) / 2
+    similarity = vectors @ vectors.T
+
+    selected: List[int] = []
+    remaining = list(range(len(chunks)))
+    while remaining:
+        if selected:
+            redundancy = similarity[np.ix_(remaining, selected)].max(axis=1)
+        else:
+            redundancy = np.zeros(len(remaining), dtype=np.float32)
+        scores = RERANK_MMR_LAMBDA * relevance[remaining] - (1 - RERANK_MMR_LAMBDA) * redundancy
+        best = remaining[int(np.argmax(scores))]
+        selected.append(best)
+        remaining.remove(best)
+
+    return [chunks[i] for i in selected]
+
+
+def cross_encoder_rerank(
+    question: str, chunks: List[Dict[str, Any]], query_vector: Optional[List[float]]
+) -> List[Dict[str, Any]]:
+    if len(chunks) < 2:
+        return chunks
+    scores = get_cross_encoder().predict([(question, chunk["content"]) for chunk in chunks])
+    order = np.argsort(-np.asarray(scores), kind="stable")
+    return [chunks[i] for i in order]
+
+
+def no_rerank(
+    question: str, chunks: List[Dict[str, Any]], query_vector: Optional[List[float]]
+) -> List[Dict[str, Any]]:
+    return chunks
+
+
+# The "llm" strategy lives in app.services.qa because it shares the QA chat
+# model and its concurrency limit; the strategies registered here run locally.
+LOCAL_RERANKERS: Dict[str, Reranker] = {
+    "embedding": mmr_rerank,
+    "cross_encoder": cross_encoder_rerank,
+    "none": no_rerank,
+}
@@ -0,0 +1,250 @@
+import logging
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+from firecrawl import Firecrawl
+from langchain_core.embeddings import Embeddings
+from langchain_ollama import ChatOllama
+from qdrant_client import AsyncQdrantClient, QdrantClient
+
+from app.services.embedding_cache import EmbeddingCache
+from app.services.semantic_cache import CollectionVersions, SemanticCache
+from app.services.site_analysis import FaqIndex, SiteAnalysisStore
+from app.config import (
+    FIRECRAWL_API_KEY,
+    QDRANT_HOST,
+    QDRANT_PORT,
+    LLM_MODEL,
+    EMBEDDING_MODEL,
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_DIMENSION,
+    EMBEDDING_THREADS,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    CROSS_ENCODER_MODEL,
+    ONNX_QUANTIZED,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_VERSIONS_PATH,
+    SITE_ANALYSIS_DB_PATH,
+    FAQ_ABOUT_MATCH_THRESHOLD,
+    FAQ_MATCH_THRESHOLD,
+    CRAWL_STATE_PATH,
+    INGEST_JOBS_DB_PATH,
+    INGEST_MAX_PENDING,
+    INGEST_MAX_WORKERS,
+)
+
+if TYPE_CHECKING:
+    from app.services.crawler import CrawlStateStore
+    from app.services.jobs import IngestionJobQueue
+    from app.services.notifier import NotificationDispatcher
+
+logger = logging.getLogger(__name__)
+
+# Process-wide registry of heavy clients and models. Every service module goes
+# through the getters below so a worker loads the embedding model once and
+# shares one pooled Qdrant connection, instead of each module building its own
+# at import time.
+_registry: Dict[str, Any] = {}
+_lock = threading.Lock()
+_ready = threading.Event()
+
+
+def _get_or_create(key: str, factory: Callable[[], Any]) -> Any:
+    resource = _registry.get(key)
+    if resource is None:
+        with _lock:
+            resource = _registry.get(key)
+            if resource is None:
+                resource = factory()
+                _registry[key] = resource
+    return resource
+
+
+def override_resource(key: str, resource: Any) -> None:
+    """Replace a registry entry, e.g. with a local stand-in for benchmarks."""
+    with _lock:
+        _registry[key] = resource
+
+
+def _create_embeddings() -> Embeddings:
+    # Backends are imported lazily so the ONNX backend never loads torch.
+    if EMBEDDING_BACKEND == "onnx":
+        from app.services.onnx_embeddings import OnnxEmbeddings
+
+        return OnnxEmbeddings()
+
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    if EMBEDDING_THREADS > 0:
+        import torch
+
+        torch.set_num_threads(EMBEDDING_THREADS)
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL,
+        model_kwargs={"device": "cpu"},
+        encode_kwargs={"batch_size": EMBEDDING_BATCH_SIZE},
+    )
+
+
+def get_embeddings() -> Embeddings:
+    return _get_or_create("embeddings", _create_embeddings)
+
+
+def embedding_cache_key() -> str:
+    """Model identity for cached vectors; backends differ slightly, so each gets its own entries."""
+    if EMBEDDING_BACKEND == "onnx":
+        return f"{EMBEDDING_MODEL}@onnx{'-int8' if ONNX_QUANTIZED else ''}"
+    return EMBEDDING_MODEL
+
+
+def get_embedding_dimension() -> int:
+    """Vector size of EMBEDDING_MODEL, probed once unless EMBEDDING_DIMENSION is set."""
+    if EMBEDDING_DIMENSION > 0:
+        return EMBEDDING_DIMENSION
+    # Resolved before _get_or_create takes the registry lock, which is not
+    # reentrant, so the factory never creates another resource.
+    embeddings = get_embeddings()
+    return _get_or_create("embedding_dimension", lambda: len(embeddings.embed_query("dimension")))
+
+
+def get_cross_encoder() -> Any:
+    def create() -> Any:
+        from sentence_transformers import CrossEncoder
+
+        return CrossEncoder(CROSS_ENCODER_MODEL, device="cpu")
+
+    return _get_or_create("cross_encoder", create)
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    if not EMBEDDING_CACHE_PATH:
+        return None
+    return _get_or_create(
+        "embedding_cache",
+        lambda: EmbeddingCache(EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES),
+    )
+
+
+def get_semantic_cache() -> SemanticCache:
+    return _get_or_create(
+        "semantic_cache",
+        lambda: SemanticCache(
+            threshold=SEMANTIC_CACHE_THRESHOLD,
+            ttl=SEMANTIC_CACHE_TTL,
+            max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+            versions=CollectionVersions(SEMANTIC_CACHE_VERSIONS_PATH),
+        ),
+    )
+
+
+def get_faq_index() -> FaqIndex:
+    return _get_or_create(
+        "faq_index",
+        lambda: FaqIndex(
+            SiteAnalysisStore(SITE_ANALYSIS_DB_PATH),
+            threshold=FAQ_MATCH_THRESHOLD,
+            about_threshold=FAQ_ABOUT_MATCH_THRESHOLD,
+        ),
+    )
+
+
+def get_qdrant_client() -> QdrantClient:
+    return _get_or_create(
+        "qdrant", lambda: QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+    )
+
+
+def get_async_qdrant_client() -> AsyncQdrantClient:
+    return _get_or_create(
+        "async_qdrant", lambda: AsyncQdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+    )
+
+
+def get_llm(temperature: float) -> ChatOllama:
+    return _get_or_create(
+        f"llm:{temperature}",
+        lambda: ChatOllama(model=LLM_MODEL, temperature=temperature),
+    )
+
+
+def get_firecrawl() -> Firecrawl:
+    return _get_or_create("firecrawl", lambda: Firecrawl(api_key=FIRECRAWL_API_KEY))
+
+
+# The services below import this module, so they are imported on first use.
+
+
+def get_crawl_state() -> "CrawlStateStore":
+    def create() -> "CrawlStateStore":
+        from app.services.crawler import CrawlStateStore
+
+        return CrawlStateStore(CRAWL_STATE_PATH)
+
+    return _get_or_create("crawl_state", create)
+
+
+def get_ingestion_graph() -> Any:
+    """Compiled graph shared by every request; compiled graphs are safe to invoke concurrently."""
+
+    def create() -> Any:
+        from app.services.ingestion_graph import build_ingestion_graph
+
+        return build_ingestion_graph()
+
+    return _get_or_create("ingestion_graph", create)
+
+
+def get_job_runner() -> "IngestionJobQueue":
+    def create() -> "IngestionJobQueue":
+        from app.services.jobs import IngestionJobQueue, JobStore
+
+        return IngestionJobQueue(JobStore(INGEST_JOBS_DB_PATH), INGEST_MAX_WORKERS, INGEST_MAX_PENDING)
+
+    return _get_or_create("job_runner", create)
+
+
+def get_notifier() -> "NotificationDispatcher":
+    def create() -> "NotificationDispatcher":
+        from app.services.notifier import NotificationDispatcher
+
+        return NotificationDispatcher()
+
+    return _get_or_create("notifier", create)
+
+
+WARMUP_MAX_DELAY = 60.0
+_warmup_stop = threading.Event()
+
+
+def warm_up() -> None:
+    """
+    Load the embedding model and open the Qdrant connection ahead of the first request.
+    Failures are logged and retried with exponential backoff until they succeed or
+    stop_warm_up() is called, so a worker that booted while Qdrant or the model hub
+    was briefly unavailable still becomes ready. Resources are created lazily on
+    first use in the meantime.
+    """
+    delay = 1.0
+    while not _warmup_stop.is_set():
+        try:
+            get_embeddings().embed_query("warm up")
+            get_qdrant_client().get_collections()
+            _ready.set()
+            logger.info("Shared resources warmed up")
+            return
+        except Exception as e:
+            logger.warning(f"Warm-up failed, retrying in {delay:.0f}s: {type(e).__name__}: {e}")
+        _warmup_stop.wait(delay)
+        delay = min(delay * 2, WARMUP_MAX_DELAY)
+
+
+def stop_warm_up() -> None:
+    _warmup_stop.set()
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
@@ -1,23 +1,78 @@
-from typing import Dict, Any
-from firecrawl import Firecrawl
-from app.config import FIRECRAWL_API_KEY
+from typing import Dict, Any, List, NamedTuple, Optional, Set
+from app.services.analyzer import MAX_INPUT_CHARS
+from app.services.chunker import BoilerplateCounter, strip_boilerplate
+from app.services.crawler import CrawlChanges, iter_crawl_pages, map_site
+from app.services.resources import get_crawl_state
+from app.services.storage import get_collection_name
+from app.services.tenancy import tenant_has_points
 
-firecrawl = Firecrawl(api_key=FIRECRAWL_API_KEY)
+
+class SiteCrawl(NamedTuple):
+    collection_name: str
+    changes: CrawlChanges
+    boilerplate: Set[str]
+    # Page text in arrival order, kept until `keep_chars` is reached.
+    texts: List[str]
+
+
+def crawl_site(url: str, keep_chars: Optional[int] = 0) -> SiteCrawl:
+    """
+    Crawl the site and compare each page, as it arrives, with what the collection
+    last stored. Only changed pages are held on to, plus page text up to
+    `keep_chars` (None keeps all of it); boilerplate is found over the whole crawl.
+    Raises when the start page or every page fails to scrape, rather than
+    reporting a crawl with nothing in it.
+    """
+    collection_name = get_collection_name(input_url=url)
+    crawl_state = get_crawl_state()
+    if not tenant_has_points(collection_name):
+        # The vectors are gone, so the recorded hashes no longer describe anything.
+        crawl_state.forget(collection_name)
+
+    urls, map_complete = map_site(url)
+    diff = crawl_state.diff(collection_name, urls, map_complete)
+    counter = BoilerplateCounter()
+    texts: List[str] = []
+    kept_chars = 0
+    failed = 0
+    start_error: Optional[str] = None
+    for page in iter_crawl_pages(urls):
+        diff.add(page)
+        if page.error is not None:
+            failed += 1
+            if page.url == url:
+                start_error = page.error
+        if not page.content:
+            continue
+        counter.add(page.content)
+        if keep_chars is None or kept_chars < keep_chars:
+            texts.append(page.content)
+            kept_chars += len(page.content)
+    if start_error is not None:
+        raise RuntimeError(f"Failed to scrape {url}: {start_error}")
+    if failed == len(urls):
+        raise RuntimeError(f"All {failed} pages of {url} failed to scrape")
+    return SiteCrawl(collection_name, diff.changes(), counter.boilerplate(), texts)
 
 
 def scrape_content(state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Crawl the site (see crawl_site). Page text, minus blocks repeated across the
+    site, goes to the analyzer up to what it can read; changed pages are passed
+    on for indexing, along with the URLs of pages that are gone and the
+    boilerplate found over the whole crawl.
+    """
     url = state["input_url"]
 
     try:
-        docs = firecrawl.crawl(url, limit=5)
-        scraped_text = ""
-
-        for document in docs.data:
-            if document.markdown:
-                scraped_text += document.markdown + "\n\n"
-            elif document.raw_html:
-                scraped_text += document.raw_html + "\n\n"
-        return {"content": scraped_text.strip()}
+        crawl = crawl_site(url, MAX_INPUT_CHARS)
+        return {
+            "content": "\n\n".join(strip_boilerplate(text, crawl.boilerplate) for text in crawl.texts).strip(),
+            "pages": [page._asdict() for page in crawl.changes.changed],
+            "boilerplate": sorted(crawl.boilerplate),
+            "unchanged_pages": len(crawl.changes.unchanged),
+            "removed_urls": crawl.changes.removed,
+        }
 
     except Exception as e:
         # print(f"Scrape error: {e}")
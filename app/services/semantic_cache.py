@@ -0,0 +1,155 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+class CollectionVersions:
+    """
+    Write counter per collection, shared through SQLite by every worker on the host,
+    so an ingest in one worker invalidates cached answers in all of them.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS versions (collection TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, collection_name: str) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT version FROM versions WHERE collection = ?", (collection_name,)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, collection_name: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO versions (collection, version) VALUES (?, 1) "
+                "ON CONFLICT(collection) DO UPDATE SET version = version + 1",
+                (collection_name,),
+            )
+            self._conn.commit()
+
+
+class _CollectionIndex:
+    def __init__(self, version: int):
+        self.version = version
+        self.vectors: Optional[np.ndarray] = None
+        self.entries: List[Dict[str, Any]] = []
+
+    def remove(self, indices: List[int]) -> None:
+        if not indices:
+            return
+        self.vectors = np.delete(self.vectors, indices, axis=0)
+        drop = set(indices)
+        self.entries = [e for i, e in enumerate(self.entries) if i not in drop]
+
+
+class SemanticCache:
+    """
+    Per-collection cache of answered questions, searched by cosine similarity of the
+    question embedding. Entries expire after ttl seconds, the least recently used
+    entry is evicted past max_entries, and a collection's entries are dropped as
+    soon as its write version changes.
+    """
+
+    def __init__(self, threshold: float, ttl: float, max_entries: int, versions: CollectionVersions):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._versions = versions
+        self._indexes: Dict[str, _CollectionIndex] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        return array / (np.linalg.norm(array) + 1e-12)
+
+    def _index(self, collection_name: str) -> _CollectionIndex:
+        version = self._versions.get(collection_name)
+        index = self._indexes.get(collection_name)
+        if index is None or index.version != version:
+            index = _CollectionIndex(version)
+            self._indexes[collection_name] = index
+        return index
+
+    def _purge_expired(self, index: _CollectionIndex, now: float) -> None:
+        index.remove([i for i, e in enumerate(index.entries) if e["expires_at"] < now])
+
+    def lookup(self, collection_name: str, vector: List[float]) -> Optional[Dict[str, Any]]:
+        query = self._normalize(vector)
+        now = time.monotonic()
+        with self._lock:
+            index = self._index(collection_name)
+            self._purge_expired(index, now)
+            if not index.entries:
+                self.misses += 1
+                return None
+            similarities = index.vectors @ query
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                self.misses += 1
+                return None
+            entry = index.entries[best]
+            entry["last_used"] = now
+            self.hits += 1
+            return {
+                "answer": entry["answer"],
+                "source_ids": entry["source_ids"],
+                "similarity": float(similarities[best]),
+            }
+
+    def store(
+        self, collection_name: str, vector: List[float], answer: str, source_ids: List[Any]
+    ) -> None:
+        if self.max_entries <= 0:
+            return
+        query = self._normalize(vector)
+        now = time.monotonic()
+        with self._lock:
+            index = self._index(collection_name)
+            self._purge_expired(index, now)
+            if len(index.entries) >= self.max_entries:
+                oldest = min(range(len(index.entries)), key=lambda i: index.entries[i]["last_used"])
+                index.remove([oldest])
+            index.vectors = (
+                query[None, :] if index.vectors is None else np.vstack([index.vectors, query])
+            )
+            index.entries.append(
+                {
+                    "answer": answer,
+                    "source_ids": source_ids,
+                    "expires_at": now + self.ttl,
+                    "last_used": now,
+                }
+            )
+
+    def invalidate(self, collection_name: str) -> None:
+        self._versions.bump(collection_name)
+        with self._lock:
+            self._indexes.pop(collection_name, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "collections": len(self._indexes),
+            "size": sum(len(index.entries) for index in self._indexes.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
@@ -0,0 +1,244 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from app.models.schemas import SiteAnalysis
+
+# Canonical phrasings matched against incoming questions. Their answers are built
+# from the analysis, so they need no retrieval or generation at question time.
+CONTACT_QUESTIONS = [
+    "How do I contact support?",
+    "How can I reach customer service?",
+    "What is your support email address?",
+    "What is your phone number?",
+    "How do I get in touch with you?",
+]
+ABOUT_QUESTIONS = [
+    "What is this website about?",
+    "What does this company do?",
+    "What is this site for?",
+]
+
+
+class FaqEntry(NamedTuple):
+    question: str
+    answer: str
+    # "contact", "about" or "query" (a suggested question answered at ingest time).
+    kind: str
+
+
+def faq_entries(analysis: SiteAnalysis) -> List[FaqEntry]:
+    """Entries answerable from the analysis alone."""
+    entries: List[FaqEntry] = []
+    contact_methods = analysis.support_and_faq_info.contact_methods
+    if contact_methods:
+        answer = "You can reach the team through:\n" + "\n".join(f"- {method}" for method in contact_methods)
+        entries += [FaqEntry(question, answer, "contact") for question in CONTACT_QUESTIONS]
+    if analysis.summary:
+        entries += [FaqEntry(question, analysis.summary, "about") for question in ABOUT_QUESTIONS]
+    return entries
+
+
+def suggested_questions(analysis: SiteAnalysis) -> List[str]:
+    """Questions the analysis expects users to ask, common questions first, without duplicates."""
+    seen = set()
+    questions: List[str] = []
+    for question in analysis.support_and_faq_info.common_questions + analysis.potential_user_queries:
+        key = " ".join(question.split()).lower()
+        if key and key not in seen:
+            seen.add(key)
+            questions.append(question.strip())
+    return questions
+
+
+class SiteAnalysisStore:
+    """Latest site analysis of each collection and its FAQ entries with their embeddings, kept in SQLite."""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS analyses (
+                collection TEXT PRIMARY KEY,
+                analysis TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS faq_entries (
+                collection TEXT NOT NULL,
+                question TEXT NOT NULL,
+                answer TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                vector BLOB NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS faq_entries_collection ON faq_entries (collection)")
+        self._conn.commit()
+
+    def save(
+        self,
+        collection_name: str,
+        analysis: SiteAnalysis,
+        entries: List[FaqEntry],
+        vectors: List[List[float]],
+        keep_answers: bool = False,
+    ) -> None:
+        """Replace the collection's analysis and FAQ entries, keeping its "query" entries if asked."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analyses (collection, analysis, updated_at) VALUES (?, ?, ?)",
+                (collection_name, analysis.model_dump_json(), time.time()),
+            )
+            if keep_answers:
+                self._conn.execute(
+                    "DELETE FROM faq_entries WHERE collection = ? AND kind != 'query'", (collection_name,)
+                )
+            else:
+                self._conn.execute("DELETE FROM faq_entries WHERE collection = ?", (collection_name,))
+            self._conn.executemany(
+                "INSERT INTO faq_entries (collection, question, answer, kind, vector) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (collection_name, e.question, e.answer, e.kind, np.asarray(v, dtype=np.float32).tobytes())
+                    for e, v in zip(entries, vectors)
+                ],
+            )
+            self._conn.commit()
+
+    def drop_answers(self, collection_name: str) -> None:
+        """Delete the precomputed "query" entries; bumping updated_at makes every worker reload."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM faq_entries WHERE collection = ? AND kind = 'query'", (collection_name,)
+            )
+            self._conn.execute(
+                "UPDATE analyses SET updated_at = ? WHERE collection = ?", (time.time(), collection_name)
+            )
+            self._conn.commit()
+
+    def get(self, collection_name: str) -> Optional[SiteAnalysis]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT analysis FROM analyses WHERE collection = ?", (collection_name,)
+            ).fetchone()
+        return SiteAnalysis.model_validate_json(row[0]) if row else None
+
+    def updated_at(self, collection_name: str) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at FROM analyses WHERE collection = ?", (collection_name,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def entries(self, collection_name: str) -> List[tuple]:
+        """(FaqEntry, vector) pairs of the collection."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT question, answer, kind, vector FROM faq_entries WHERE collection = ?",
+                (collection_name,),
+            ).fetchall()
+        return [
+            (FaqEntry(question, answer, kind), np.frombuffer(vector, dtype=np.float32))
+            for question, answer, kind, vector in rows
+        ]
+
+
+class _LoadedEntries:
+    def __init__(self, updated_at: Optional[float], pairs: List[tuple]):
+        self.updated_at = updated_at
+        self.entries = [entry for entry, _ in pairs]
+        self.about = np.array([entry.kind == "about" for entry in self.entries], dtype=bool)
+        self.vectors: Optional[np.ndarray] = None
+        if pairs:
+            vectors = np.vstack([vector for _, vector in pairs])
+            self.vectors = vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+
+
+class FaqIndex:
+    """
+    Per-collection FAQ entries searched by cosine similarity of the question
+    embedding. "about" entries answer with the LLM's summary rather than
+    retrieved text, so they must clear the stricter `about_threshold`. Entries
+    are held in memory and reloaded from the store whenever the collection's
+    analysis is replaced, so every worker sees new ingests.
+    """
+
+    def __init__(self, store: SiteAnalysisStore, threshold: float, about_threshold: Optional[float] = None):
+        self.store = store
+        self.threshold = threshold
+        self.about_threshold = threshold if about_threshold is None else about_threshold
+        self.hits = 0
+        self.misses = 0
+        self._loaded: Dict[str, _LoadedEntries] = {}
+        self._lock = threading.Lock()
+
+    def _entries(self, collection_name: str) -> _LoadedEntries:
+        updated_at = self.store.updated_at(collection_name)
+        loaded = self._loaded.get(collection_name)
+        if loaded is None or loaded.updated_at != updated_at:
+            loaded = _LoadedEntries(updated_at, self.store.entries(collection_name) if updated_at else [])
+            self._loaded[collection_name] = loaded
+        return loaded
+
+    def lookup(self, collection_name: str, vector: List[float]) -> Optional[Dict[str, Any]]:
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) + 1e-12)
+        with self._lock:
+            loaded = self._entries(collection_name)
+            if loaded.vectors is None:
+                self.misses += 1
+                return None
+            similarities = loaded.vectors @ query
+            required = np.where(loaded.about, self.about_threshold, self.threshold)
+            best = int(np.argmax(np.where(similarities >= required, similarities, -np.inf)))
+            if similarities[best] < required[best]:
+                self.misses += 1
+                return None
+            self.hits += 1
+        entry = loaded.entries[best]
+        return {
+            "question": entry.question,
+            "answer": entry.answer,
+            "kind": entry.kind,
+            "similarity": float(similarities[best]),
+        }
+
+    def replace(
+        self,
+        collection_name: str,
+        analysis: SiteAnalysis,
+        entries: List[FaqEntry],
+        vectors: List[List[float]],
+        keep_answers: bool = False,
+    ) -> None:
+        self.store.save(collection_name, analysis, entries, vectors, keep_answers)
+        with self._lock:
+            self._loaded.pop(collection_name, None)
+
+    def drop_answers(self, collection_name: str) -> None:
+        """Forget answers precomputed from the collection's content, e.g. after it changed."""
+        self.store.drop_answers(collection_name)
+        with self._lock:
+            self._loaded.pop(collection_name, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "collections": len(self._loaded),
+            "size": sum(len(loaded.entries) for loaded in self._loaded.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
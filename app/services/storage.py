@@ -1,73 +1,117 @@
-from typing import Dict, Any, List
+from itertools import chain
+from typing import Dict, Any, Iterable, List
 from urllib.parse import urlparse
 import os
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import Distance, VectorParams
-from langchain_core.documents import Document
-from langchain_qdrant import QdrantVectorStore
-from app.config import QDRANT_HOST, QDRANT_PORT
-from app.services.chunker import chunk_web_content  
-from app.config import EMBEDDING_MODEL
-from langchain_huggingface import HuggingFaceEmbeddings
-
-client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
-embeddings = HuggingFaceEmbeddings(
-    model_name=EMBEDDING_MODEL, model_kwargs={"device": "cpu"}
+import re
+from qdrant_client.http.models import (
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    MatchAny,
+)
+from app.services.embedding_pipeline import embed_and_upsert
+from app.services.collection_profile import collection_index_kwargs, get_collection_profile
+from app.services.hybrid import collection_vectors_config
+from app.services.resources import (
+    get_embedding_dimension,
+    get_faq_index,
+    get_qdrant_client,
+    get_semantic_cache,
+)
+from app.services.tenancy import (
+    create_tenant_index,
+    is_shared,
+    mark_tenant_known,
+    physical_collection,
+    tenant_filter,
 )
 
 
-def get_collection_name(input_url: str = "", pdf_path: str = "") -> str:
+def get_collection_name(input_url: str = "", pdf_path: str = "", pdf_name: str = "") -> str:
+    """
+    Logical collection name for a source. Uploaded PDFs are stored under a
+    temporary path, so callers pass the original file name as pdf_name.
+    """
     if input_url:
         parsed = urlparse(input_url)
         domain = parsed.netloc.replace(".", "_").replace("-", "_")
         name = f"{domain}"
         return name.lower()
 
-    elif pdf_path:
-        pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
-        pdf_name = pdf_name.replace(" ", "_").replace("-", "_").lower()[:50]
-        return f"pdf_name"
+    elif pdf_name or pdf_path:
+        pdf_name = os.path.splitext(os.path.basename(pdf_name or pdf_path))[0]
+        pdf_name = re.sub(r"[^a-z0-9_]", "_", pdf_name.replace(" ", "_").replace("-", "_").lower())[:50]
+        return pdf_name or "pdf_document"
 
     else:
         return "debug_unknown_source"
 
 
-def store_chunks(state: Dict[str, Any]) -> Dict[str, Any]:
-    chunks = state.get("chunks", [])
-    if not chunks:
-        # print("[store_node] No chunks found → skipping storage")  
-        return {"storage_info": "No chunks to store"}
-
-    # print(f"[store_node] Found {len(chunks)} chunks")  
+def ensure_collection(collection_name: str) -> None:
+    client = get_qdrant_client()
+    physical = physical_collection(collection_name)
+    if not client.collection_exists(physical):
+        profile = get_collection_profile()
+        client.create_collection(
+            collection_name=physical,
+            **collection_vectors_config(get_embedding_dimension(), on_disk=profile.on_disk),
+            **collection_index_kwargs(profile, multitenant=is_shared()),
+        )
+        if is_shared():
+            create_tenant_index(physical)
+        # print(f"[store_node] Created collection '{collection_name}'")
 
-    input_url = state.get("input_url", "").strip()
-    pdf_path = state.get("pdf_path", "").strip()
 
-    collection_name = get_collection_name(input_url=input_url, pdf_path=pdf_path)
-    # print(f"[store_node] Using collection name: {collection_name}")  
+def invalidate_answers(collection_name: str) -> None:
+    """Drop cached and precomputed FAQ answers that were built from the collection's old content."""
+    get_semantic_cache().invalidate(collection_name)
+    get_faq_index().drop_answers(collection_name)
 
-    documents = [
-        Document(page_content=chunk["content"], metadata=chunk.get("metadata", {}))
-        for chunk in chunks
-    ]
 
-    if not client.collection_exists(collection_name):
-        client.create_collection(
-            collection_name=collection_name,
-            vectors_config=VectorParams(size=384, distance=Distance.COSINE),
+def delete_page_vectors(collection_name: str, urls: List[str]) -> None:
+    """Remove every point whose chunk came from one of the given page URLs."""
+    client = get_qdrant_client()
+    physical = physical_collection(collection_name)
+    if not urls or not client.collection_exists(physical):
+        return
+    tenant = tenant_filter(collection_name)
+    for start in range(0, len(urls), 256):
+        client.delete(
+            collection_name=physical,
+            points_selector=FilterSelector(
+                filter=Filter(
+                    must=[
+                        *(tenant.must if tenant else []),
+                        FieldCondition(
+                            key="metadata.source_url",
+                            match=MatchAny(any=urls[start : start + 256]),
+                        ),
+                    ]
+                )
+            ),
+            wait=True,
         )
-        # print(f"[store_node] Created collection '{collection_name}'")
+    invalidate_answers(collection_name)
+
+
+def store_chunk_stream(chunks: Iterable[Dict[str, Any]], collection_name: str) -> Dict[str, Any]:
+    """Store chunks from any iterable, consuming it lazily so large sources never sit in memory."""
+    iterator = iter(chunks)
+    first = next(iterator, None)
+    if first is None:
+        return {"storage_info": "No chunks to store"}
+
+    ensure_collection(collection_name)
 
-    vectorstore = QdrantVectorStore(
-        client=client,
-        collection_name=collection_name,
-        embedding=embeddings,
-    )
-    vectorstore.add_documents(documents)
+    stats = embed_and_upsert(chain([first], iterator), collection_name)
+    if stats.stored:
+        invalidate_answers(collection_name)
+    if stats.stored or stats.skipped:
+        mark_tenant_known(collection_name)
 
     # print("[store_node] Documents added successfully")
 
     return {
         "collection_name": collection_name,
-        "storage_info": f"Stored {len(documents)} vectors in '{collection_name}'",
+        "storage_info": f"Stored {stats.stored} vectors in '{collection_name}' ({stats.skipped} unchanged chunks skipped)",
     }
@@ -0,0 +1,112 @@
+from typing import Any, Dict, Optional
+
+from qdrant_client.http.models import (
+    FieldCondition,
+    Filter,
+    KeywordIndexParams,
+    KeywordIndexType,
+    MatchValue,
+)
+
+from app.config import KNOWN_TENANTS_TTL, QDRANT_SHARED_COLLECTION
+from app.services.cache import TTLCache
+from app.services.resources import get_async_qdrant_client, get_qdrant_client
+
+# The rest of the app addresses knowledge bases by their logical collection name
+# ("example_com", "handbook"). With QDRANT_SHARED_COLLECTION set, every knowledge
+# base lives in that one Qdrant collection and the logical name becomes a tenant
+# payload field that every read and delete filters on.
+TENANT_FIELD = "tenant"
+
+# Only positive answers are cached, so a newly ingested tenant is visible at once.
+_known_tenants = TTLCache(maxsize=10000, ttl=KNOWN_TENANTS_TTL)
+
+
+def is_shared() -> bool:
+    return bool(QDRANT_SHARED_COLLECTION)
+
+
+def physical_collection(collection_name: str) -> str:
+    return QDRANT_SHARED_COLLECTION or collection_name
+
+
+def tenant_filter(collection_name: str) -> Optional[Filter]:
+    if not is_shared():
+        return None
+    return Filter(must=[FieldCondition(key=TENANT_FIELD, match=MatchValue(value=collection_name))])
+
+
+def tenant_payload(collection_name: str) -> Dict[str, Any]:
+    return {TENANT_FIELD: collection_name} if is_shared() else {}
+
+
+def tenant_point_source(collection_name: str, source: str) -> str:
+    """Point ID source key; tenants sharing a collection must not share points."""
+    return f"{collection_name}\n{source}" if is_shared() else source
+
+
+def create_tenant_index(collection_name: str) -> None:
+    """Keyword index on the tenant field; is_tenant lets Qdrant co-locate each tenant's points."""
+    get_qdrant_client().create_payload_index(
+        collection_name=collection_name,
+        field_name=TENANT_FIELD,
+        field_schema=KeywordIndexParams(type=KeywordIndexType.KEYWORD, is_tenant=True),
+        wait=True,
+    )
+
+
+def tenant_has_points(collection_name: str) -> bool:
+    """Uncached check that the knowledge base exists and, when shared, holds points."""
+    client = get_qdrant_client()
+    physical = physical_collection(collection_name)
+    if not client.collection_exists(physical):
+        return False
+    if not is_shared():
+        return True
+    points, _ = client.scroll(
+        collection_name=physical,
+        scroll_filter=tenant_filter(collection_name),
+        limit=1,
+        with_payload=False,
+        with_vectors=False,
+    )
+    return bool(points)
+
+
+async def atenant_has_points(collection_name: str) -> bool:
+    client = get_async_qdrant_client()
+    physical = physical_collection(collection_name)
+    if not await client.collection_exists(physical):
+        return False
+    if not is_shared():
+        return True
+    points, _ = await client.scroll(
+        collection_name=physical,
+        scroll_filter=tenant_filter(collection_name),
+        limit=1,
+        with_payload=False,
+        with_vectors=False,
+    )
+    return bool(points)
+
+
+def mark_tenant_known(collection_name: str) -> None:
+    _known_tenants.set(collection_name, True)
+
+
+def tenant_exists(collection_name: str) -> bool:
+    if _known_tenants.get(collection_name):
+        return True
+    if tenant_has_points(collection_name):
+        mark_tenant_known(collection_name)
+        return True
+    return False
+
+
+async def atenant_exists(collection_name: str) -> bool:
+    if _known_tenants.get(collection_name):
+        return True
+    if await atenant_has_points(collection_name):
+        mark_tenant_known(collection_name)
+        return True
+    return False
@@ -0,0 +1,153 @@
+"""
+Recall and latency of each collection profile against exact search.
+
+Copies the dense vectors of an existing collection (or generates random ones)
+into one scratch collection per profile, then searches each with the profile's
+search parameters and compares the top k with an exact (brute-force) search.
+
+    python -m benchmarks.collection_profiles --source example_com --queries 200
+    python -m benchmarks.collection_profiles --synthetic 20000
+
+Scratch collections are named bench_profile_<profile> and deleted afterwards.
+"""
+import argparse
+import statistics
+import time
+from typing import Dict, List
+
+import numpy as np
+from qdrant_client.http.models import PointStruct, SearchParams
+
+from app.services.collection_profile import (
+    PROFILES,
+    collection_index_kwargs,
+    get_collection_profile,
+    search_params,
+)
+from app.services.hybrid import DENSE_VECTOR, collection_vectors_config
+from app.services.resources import get_qdrant_client
+
+
+def _source_vectors(collection_name: str, limit: int) -> np.ndarray:
+    client = get_qdrant_client()
+    vectors: List[List[float]] = []
+    offset = None
+    while len(vectors) < limit:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=min(256, limit - len(vectors)),
+            offset=offset,
+            with_payload=False,
+            with_vectors=True,
+        )
+        for point in points:
+            vector = point.vector
+            vectors.append(vector.get(DENSE_VECTOR) if isinstance(vector, dict) else vector)
+        if offset is None:
+            break
+    return np.asarray(vectors, dtype=np.float32)
+
+
+def _synthetic_vectors(count: int, dimension: int, seed: int) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _query_vectors(vectors: np.ndarray, count: int, seed: int) -> np.ndarray:
+    # Perturbed copies of stored vectors, so queries land near real data.
+    rng = np.random.default_rng(seed + 1)
+    picked = vectors[rng.choice(len(vectors), size=min(count, len(vectors)), replace=False)]
+    noisy = picked + rng.normal(scale=0.05, size=picked.shape).astype(np.float32)
+    return noisy / np.linalg.norm(noisy, axis=1, keepdims=True)
+
+
+def _load(collection_name: str, profile_name: str, vectors: np.ndarray) -> None:
+    client = get_qdrant_client()
+    profile = get_collection_profile(profile_name)
+    if client.collection_exists(collection_name):
+        client.delete_collection(collection_name)
+    kwargs = collection_vectors_config(vectors.shape[1], on_disk=profile.on_disk)
+    # Scratch collections hold dense vectors only.
+    kwargs.pop("sparse_vectors_config", None)
+    client.create_collection(collection_name=collection_name, **kwargs, **collection_index_kwargs(profile))
+    named = isinstance(kwargs["vectors_config"], dict)
+    for start in range(0, len(vectors), 256):
+        client.upsert(
+            collection_name=collection_name,
+            points=[
+                PointStruct(id=start + i, vector={DENSE_VECTOR: v.tolist()} if named else v.tolist())
+                for i, v in enumerate(vectors[start : start + 256])
+            ],
+            wait=True,
+        )
+
+
+def _search(collection_name: str, query: np.ndarray, k: int, params, using) -> List[int]:
+    response = get_qdrant_client().query_points(
+        collection_name=collection_name,
+        query=query.tolist(),
+        using=using,
+        limit=k,
+        search_params=params,
+        with_payload=False,
+    )
+    return [point.id for point in response.points]
+
+
+def run(vectors: np.ndarray, queries: np.ndarray, k: int, profiles: List[str]) -> List[Dict[str, float]]:
+    client = get_qdrant_client()
+    results = []
+    for profile_name in profiles:
+        collection_name = f"bench_profile_{profile_name}"
+        _load(collection_name, profile_name, vectors)
+        info = client.get_collection(collection_name)
+        using = DENSE_VECTOR if isinstance(info.config.params.vectors, dict) else None
+        params = search_params(get_collection_profile(profile_name))
+        recalls, latencies = [], []
+        try:
+            for query in queries:
+                truth = set(_search(collection_name, query, k, SearchParams(exact=True), using))
+                started = time.perf_counter()
+                found = _search(collection_name, query, k, params, using)
+                latencies.append((time.perf_counter() - started) * 1000)
+                recalls.append(len(truth.intersection(found)) / max(len(truth), 1))
+        finally:
+            client.delete_collection(collection_name)
+        latencies.sort()
+        results.append(
+            {
+                "profile": profile_name,
+                "recall": statistics.mean(recalls),
+                "p50_ms": latencies[len(latencies) // 2],
+                "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", help="Existing collection to copy dense vectors from")
+    parser.add_argument("--synthetic", type=int, default=10000, help="Random vectors when no --source is given")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--limit", type=int, default=50000, help="Max vectors copied from --source")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--profiles", nargs="+", default=sorted(PROFILES))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.source:
+        vectors = _source_vectors(args.source, args.limit)
+    else:
+        vectors = _synthetic_vectors(args.synthetic, args.dimension, args.seed)
+    queries = _query_vectors(vectors, args.queries, args.seed)
+
+    print(f"{len(vectors)} vectors, {len(queries)} queries, recall@{args.k}")
+    print(f"{'profile':<12} {'recall':>8} {'p50 ms':>8} {'p95 ms':>8}")
+    for row in run(vectors, queries, args.k, args.profiles):
+        print(f"{row['profile']:<12} {row['recall']:>8.3f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
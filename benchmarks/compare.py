@@ -0,0 +1,51 @@
+"""
+Compare two benchmark result files.
+
+    python -m benchmarks.compare benchmarks/results/old.json benchmarks/results/new.json
+
+Prints every numeric metric present in both runs with the relative change.
+"""
+import argparse
+import json
+from typing import Any, Dict
+
+
+def _flatten(data: Any, prefix: str = "") -> Dict[str, float]:
+    flat: Dict[str, float] = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key == "meta":
+                continue
+            flat.update(_flatten(value, f"{prefix}{key}."))
+    elif isinstance(data, (int, float)) and not isinstance(data, bool):
+        flat[prefix.rstrip(".")] = float(data)
+    return flat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    for label, run in (("baseline", baseline), ("candidate", candidate)):
+        meta = run.get("meta", {})
+        print(f"{label:<10} {meta.get('git_commit', 'unknown')[:12]} {meta.get('timestamp', '')}")
+
+    old, new = _flatten(baseline), _flatten(candidate)
+    width = max((len(key) for key in old if key in new), default=10)
+    print(f"{'metric':<{width}} {'baseline':>12} {'candidate':>12} {'change':>9}")
+    for key in sorted(old):
+        if key not in new:
+            continue
+        change = (new[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+        print(f"{key:<{width}} {old[key]:>12.2f} {new[key]:>12.2f} {change:>+8.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""Local stand-ins for Ollama, Firecrawl, the Qdrant server and SMTP used by the benchmarks."""
+import asyncio
+import json
+import re
+import socketserver
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+FIXTURE_ANALYSIS = {
+    "website_type": "SaaS product site",
+    "primary_purpose": "selling a help desk product",
+    "summary": "Fixture site describing plans, features and support policies.",
+    "key_topics_or_features": ["Pricing plans", "Integrations", "Support policies"],
+    "target_audience": ["Small support teams"],
+    "important_entities": ["Product: Fixture Desk"],
+    "notable_links_or_actions": ["Contact form at /contact"],
+    "support_and_faq_info": {
+        "common_questions": ["How do I reset my password?", "What plans are available?"],
+        "contact_methods": ["Email: support@fixture.test", "Phone: +1 555 0100"],
+        "troubleshooting_guides": ["Guide: fixing login issues"],
+    },
+    "business_model_or_intent": "Subscription-based SaaS",
+    "tech_or_tools_mentioned": ["Stripe"],
+    "potential_user_queries": ["What does the Pro plan cost?", "How do I contact support?"],
+    "confidence": 0.8,
+}
+
+CONSOLIDATED_FIELDS = ("website_type", "primary_purpose", "summary", "business_model_or_intent")
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Replaces ChatOllama with canned replies after a simulated delay: `latency`
+    seconds of prefill plus `token_latency` per generated token. Replies follow
+    the prompt type (rewrite, rerank, site analysis, analysis consolidation or
+    answer) so every code path downstream of the model still runs.
+    """
+
+    latency: float = 0.2
+    token_latency: float = 0.005
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-ollama"
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        system = str(messages[0].content) if messages else ""
+        last = str(messages[-1].content) if messages else ""
+        if "query rewriting agent" in system:
+            match = re.search(r"User question:\s*(.+)", last, flags=re.DOTALL)
+            return (match.group(1) if match else last).strip()
+        if "document re-ranker" in system:
+            ids = re.findall(r"# CHUNK ID: (\d+)", last)
+            return ", ".join(ids)
+        if "web intelligence analyst" in system:
+            return json.dumps(FIXTURE_ANALYSIS)
+        if "merge partial analyses" in system:
+            return json.dumps({field: FIXTURE_ANALYSIS[field] for field in CONSOLIDATED_FIELDS})
+        # Answer with the first sentence of the first extract in the context.
+        match = re.search(r"\(ID: [^)]*\):\n(.+?[.!?])(\s|$)", system, flags=re.DOTALL)
+        return match.group(1).strip() if match else "No answer found our team will reach out to you."
+
+    def _delay(self, reply: str) -> float:
+        return self.latency + self.token_latency * _estimate_tokens(reply)
+
+    def _message(self, messages: List[BaseMessage], reply: str) -> AIMessage:
+        prompt_tokens = sum(_estimate_tokens(str(m.content)) for m in messages)
+        output_tokens = _estimate_tokens(reply)
+        return AIMessage(
+            content=reply,
+            usage_metadata={
+                "input_tokens": prompt_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": prompt_tokens + output_tokens,
+            },
+        )
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        reply = self._reply(messages)
+        time.sleep(self._delay(reply))
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, reply))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        reply = self._reply(messages)
+        await asyncio.sleep(self._delay(reply))
+        return ChatResult(generations=[ChatGeneration(message=self._message(messages, reply))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for token in re.findall(r"\S+\s*", self._reply(messages)):
+            time.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for token in re.findall(r"\S+\s*", self._reply(messages)):
+            await asyncio.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+class FakeFirecrawl:
+    """Serves fixture pages through Firecrawl's map/scrape interface."""
+
+    def __init__(self, sites: Dict[str, Dict[str, str]], latency: float = 0.05):
+        # {site root url: {page url: markdown}}
+        self.sites = sites
+        self.latency = latency
+
+    def _site(self, url: str) -> Dict[str, str]:
+        for root, pages in self.sites.items():
+            if url.startswith(root):
+                return pages
+        return {}
+
+    def map(self, url: str, limit: int = 100, **kwargs: Any) -> Any:
+        time.sleep(self.latency)
+        links = [SimpleNamespace(url=page_url) for page_url in list(self._site(url))[:limit]]
+        return SimpleNamespace(links=links)
+
+    def scrape(self, url: str, formats: Optional[List[str]] = None, **kwargs: Any) -> Any:
+        time.sleep(self.latency)
+        markdown = self._site(url).get(url)
+        if markdown is None:
+            raise ValueError(f"No fixture page for {url}")
+        return SimpleNamespace(markdown=markdown, metadata=SimpleNamespace(status_code=200))
+
+
+class LockedQdrantClient:
+    """
+    Serialises calls into a local-mode QdrantClient, which is not thread-safe,
+    so the ingestion pipeline's uploader threads can share it.
+    """
+
+    def __init__(self, client: Any):
+        self._client = client
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args: Any, **kwargs: Any) -> Any:
+            with self._lock:
+                return attr(*args, **kwargs)
+
+        return call
+
+
+class AsyncQdrantAdapter:
+    """AsyncQdrantClient interface over a sync client, so async and sync paths see the same data."""
+
+    def __init__(self, client: Any):
+        self._client = client
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._client, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args: Any, **kwargs: Any) -> Any:
+            return await asyncio.to_thread(attr, *args, **kwargs)
+
+        return call
+
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line: bytes) -> None:
+        self.wfile.write(line + b"\r\n")
+
+    def handle(self) -> None:
+        owner: "LocalSmtpServer" = self.server.owner  # type: ignore[attr-defined]
+        owner._count("connections")
+        self._reply(b"220 localhost SMTP stand-in")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            time.sleep(owner.latency)
+            command = line.strip().upper()
+            if command.startswith((b"EHLO", b"HELO")):
+                self._reply(b"250 localhost")
+            elif command.startswith((b"MAIL", b"RCPT", b"RSET", b"NOOP")):
+                self._reply(b"250 OK")
+            elif command == b"DATA":
+                if owner._take_failure():
+                    self._reply(b"451 Temporary failure, try again")
+                    continue
+                self._reply(b"354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data == b".\r\n":
+                        break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                owner._store(b"".join(lines))
+                self._reply(b"250 OK: queued")
+            elif command == b"QUIT":
+                self._reply(b"221 Bye")
+                return
+            else:
+                self._reply(b"502 Command not implemented")
+
+
+class LocalSmtpServer:
+    """
+    Plain SMTP server on localhost that keeps every message it accepts. `latency`
+    is added to each command to stand in for a slow mail server, and the first
+    `fail_first` DATA commands are refused with a temporary error. There is no TLS
+    or AUTH, so use it with EMAIL_STARTTLS=false and no EMAIL_PASSWORD.
+    """
+
+    def __init__(self, port: int = 0, latency: float = 0.0, fail_first: int = 0):
+        self.latency = latency
+        self.fail_first = fail_first
+        self.messages: List[bytes] = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", port), _SmtpHandler)
+        self._server.daemon_threads = True
+        self._server.owner = self  # type: ignore[attr-defined]
+        self.port = self._server.server_address[1]
+        self._thread: Optional[threading.Thread] = None
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _take_failure(self) -> bool:
+        with self._lock:
+            if self.fail_first <= 0:
+                return False
+            self.fail_first -= 1
+            return True
+
+    def _store(self, message: bytes) -> None:
+        with self._lock:
+            self.messages.append(message)
+
+    def start(self) -> "LocalSmtpServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
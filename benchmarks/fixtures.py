@@ -0,0 +1,97 @@
+"""Deterministic fixture sites, PDFs and questions for the benchmarks."""
+import os
+import random
+from typing import Dict, List, Tuple
+
+PLANS = ["Starter", "Team", "Pro", "Business", "Enterprise"]
+FEATURES = [
+    "single sign-on", "audit logs", "custom domains", "API access", "live chat",
+    "priority support", "data export", "webhooks", "role-based access", "SLA reporting",
+]
+TOPICS = [
+    "billing", "shipping", "returns", "account security", "integrations",
+    "onboarding", "data retention", "invoices", "password reset", "mobile app",
+]
+WORDS = (
+    "customer account team order invoice payment refund request policy support "
+    "service product feature setting dashboard report user admin email notice "
+    "period days business window access update change review process guide"
+).split()
+
+
+def _sentence(rng: random.Random) -> str:
+    words = rng.sample(WORDS, rng.randint(8, 14))
+    return " ".join(words).capitalize() + "."
+
+
+def _fact(rng: random.Random, site: int, page: int) -> Tuple[str, str]:
+    """One answerable fact and the question that retrieves it."""
+    plan = rng.choice(PLANS)
+    kind = rng.randrange(3)
+    if kind == 0:
+        price = rng.randint(5, 400)
+        return (
+            f"The {plan} plan costs ${price} per seat per month.",
+            f"How much does the {plan} plan cost?",
+        )
+    if kind == 1:
+        code = f"E-{site}{page:02d}{rng.randint(10, 99)}"
+        topic = rng.choice(TOPICS)
+        return (
+            f"Error {code} means the {topic} request was rejected; retry after 10 minutes.",
+            f"What does error {code} mean?",
+        )
+    feature = rng.choice(FEATURES)
+    return (
+        f"{feature.capitalize()} is included in the {plan} plan and above.",
+        f"Which plan includes {feature}?",
+    )
+
+
+def make_sites(count: int, pages: int, seed: int = 0) -> Tuple[Dict[str, Dict[str, str]], List[Tuple[str, str]]]:
+    """
+    Returns ({site root: {page url: markdown}}, [(site root, question)]).
+    Every page has a few headed sections of filler text around answerable facts.
+    """
+    rng = random.Random(seed)
+    sites: Dict[str, Dict[str, str]] = {}
+    questions: List[Tuple[str, str]] = []
+    for site in range(count):
+        root = f"https://site{site}.fixture.test"
+        sites[root] = {}
+        for page in range(pages):
+            url = root if page == 0 else f"{root}/{rng.choice(TOPICS).replace(' ', '-')}-{page}"
+            sections = []
+            for _ in range(rng.randint(3, 6)):
+                fact, question = _fact(rng, site, page)
+                questions.append((root, question))
+                body = " ".join(_sentence(rng) for _ in range(rng.randint(3, 8)))
+                sections.append(f"## {rng.choice(TOPICS).title()}\n\n{body} {fact} {_sentence(rng)}")
+            sites[root][url] = f"# Fixture Desk page {page}\n\n" + "\n\n".join(sections)
+    return sites, questions
+
+
+def make_pdfs(directory: str, count: int, pages: int, seed: int = 0) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """Writes `count` PDFs of `pages` text pages; returns their paths and (file name, question) pairs."""
+    import pymupdf
+
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed + 1000)
+    paths: List[str] = []
+    questions: List[Tuple[str, str]] = []
+    for index in range(count):
+        name = f"fixture_manual_{index}.pdf"
+        doc = pymupdf.open()
+        for page_number in range(pages):
+            paragraphs = []
+            for _ in range(4):
+                fact, question = _fact(rng, 100 + index, page_number)
+                questions.append((name, question))
+                paragraphs.append(" ".join(_sentence(rng) for _ in range(4)) + f" {fact}")
+            page = doc.new_page()
+            page.insert_textbox(page.rect + (50, 50, -50, -50), "\n\n".join(paragraphs), fontsize=9)
+        path = os.path.join(directory, name)
+        doc.save(path)
+        doc.close()
+        paths.append(path)
+    return paths, questions
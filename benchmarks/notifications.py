@@ -0,0 +1,127 @@
+"""
+Cost of escalation notifications on the request path, against a local SMTP stand-in.
+
+Sends the same stream of unanswered questions, with repeats, twice:
+- direct: one SMTP connection and mail per question, as the request path used to;
+- dispatcher: notify_unanswered, which queues the question for the background
+  dispatcher (dedup, digests, retries, one persistent connection).
+
+    python -m benchmarks.notifications --questions 200 --unique 20 --smtp-latency 0.02
+"""
+import argparse
+import json
+import os
+import random
+import smtplib
+import time
+from typing import Any, Dict, List
+
+from benchmarks.fakes import LocalSmtpServer
+from benchmarks.run import _percentiles
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--unique", type=int, default=20, help="Distinct questions among them")
+    parser.add_argument("--smtp-latency", type=float, default=0.02, help="Simulated seconds per SMTP command")
+    parser.add_argument("--fail-first", type=int, default=1, help="DATA commands the stand-in refuses before accepting")
+    parser.add_argument("--digest-interval", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON")
+    return parser.parse_args()
+
+
+def _configure(server: LocalSmtpServer, args: argparse.Namespace) -> None:
+    """Point the notifier at the stand-in; must run before app.config is imported."""
+    os.environ.update(
+        {
+            "EMAIL_HOST": "127.0.0.1",
+            "EMAIL_PORT": str(server.port),
+            "EMAIL_STARTTLS": "false",
+            "EMAIL_USERNAME": "",
+            "EMAIL_PASSWORD": "",
+            "EMAIL_FROM": "supportai@localhost",
+            "EMAIL_RECIPIENT": "support@localhost",
+            "NOTIFY_DIGEST_INTERVAL": str(args.digest_interval),
+            "NOTIFY_RETRY_BACKOFF": "0.1",
+        }
+    )
+
+
+def _direct(questions: List[str], port: int) -> List[float]:
+    from email.mime.text import MIMEText
+
+    latencies = []
+    for question in questions:
+        started = time.perf_counter()
+        try:
+            server = smtplib.SMTP("127.0.0.1", port, timeout=10)
+            message = MIMEText(question)
+            message["Subject"] = f"Unanswered question from Support AI: {question[:70]}"
+            message["From"] = "supportai@localhost"
+            message["To"] = "support@localhost"
+            server.send_message(message)
+            server.quit()
+        except smtplib.SMTPException:
+            pass
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def main() -> None:
+    args = _parse_args()
+    rng = random.Random(args.seed)
+    pool = [f"Fixture question number {index} about the refund window?" for index in range(args.unique)]
+    questions = [rng.choice(pool) for _ in range(args.questions)]
+
+    direct_server = LocalSmtpServer(latency=args.smtp_latency).start()
+    direct = _direct(questions, direct_server.port)
+    direct_server.stop()
+
+    server = LocalSmtpServer(latency=args.smtp_latency, fail_first=args.fail_first).start()
+    _configure(server, args)
+    from app.services.notifier import notify_unanswered
+    from app.services.resources import get_notifier
+
+    dispatcher = get_notifier()
+    dispatcher.start()
+    queued = []
+    started = time.perf_counter()
+    for question in questions:
+        call_started = time.perf_counter()
+        notify_unanswered(question)
+        queued.append(time.perf_counter() - call_started)
+    dispatcher.stop(timeout=60)
+    elapsed = time.perf_counter() - started
+    server.stop()
+
+    results: Dict[str, Any] = {
+        "questions": args.questions,
+        "unique": args.unique,
+        "direct": {
+            "call_latency": _percentiles(direct),
+            "mails": len(direct_server.messages),
+            "connections": direct_server.connections,
+        },
+        "dispatcher": {
+            "call_latency": _percentiles(queued),
+            "mails": len(server.messages),
+            "connections": server.connections,
+            "seconds_to_flush": elapsed,
+        },
+    }
+    for name in ("direct", "dispatcher"):
+        r = results[name]
+        print(
+            f"{name:<10} per call p50 {r['call_latency']['p50_ms']:8.2f} ms  p99 {r['call_latency']['p99_ms']:8.2f} ms  "
+            f"{r['mails']} mails over {r['connections']} connections"
+        )
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as out:
+            json.dump(results, out, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""
+End-to-end benchmark of ingestion and question answering against local stand-ins.
+
+The real pipelines run unchanged, with the real embedding model, while the
+external services are replaced through the resource registry:
+- Ollama is a fake chat model with configurable prefill and per-token latency;
+- Firecrawl serves generated fixture sites;
+- Qdrant runs in local mode (in memory, or on disk with --qdrant-path).
+
+Stages:
+- ingest_pdf, ingest_url: per-document latency, per-node latency and chunks/sec;
+- recrawl_url: the same sites again, where every page is unchanged;
+- qa: per-stage latency of answering each question;
+- ask_load: requests/sec and latency of concurrent POST /api/v1/ask calls;
+- ask_batch: questions/sec for the same questions through POST /api/v1/ask/batch.
+
+Results are printed and written as JSON; compare two runs with
+`python -m benchmarks.compare old.json new.json`.
+
+    python -m benchmarks.run --questions 100 --concurrency 16 --requests 400
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sites", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=5, help="Pages per fixture site")
+    parser.add_argument("--pdfs", type=int, default=3)
+    parser.add_argument("--pdf-pages", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=200, help="Total /ask requests in the load stage")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=50, help="Questions per /ask/batch request")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="Simulated prefill seconds per LLM call")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="Simulated seconds per generated token")
+    parser.add_argument("--scrape-latency", type=float, default=0.05, help="Simulated seconds per Firecrawl call")
+    parser.add_argument("--semantic-cache", action="store_true", help="Leave the semantic answer cache on")
+    parser.add_argument("--qdrant-path", help="Local Qdrant storage directory (default: in memory)")
+    parser.add_argument("--workdir", help="Directory for fixtures and SQLite files (default: temporary)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results", f"run-{int(time.time())}.json"))
+    return parser.parse_args()
+
+
+def _isolate(workdir: str, args: argparse.Namespace) -> None:
+    """Point every on-disk store at the work directory; must run before app.config is imported."""
+    os.environ.update(
+        {
+            "EMBEDDING_CACHE_PATH": os.path.join(workdir, "embedding_cache.sqlite3"),
+            "SEMANTIC_CACHE_VERSIONS_PATH": os.path.join(workdir, "collection_versions.sqlite3"),
+            "CRAWL_STATE_PATH": os.path.join(workdir, "crawl_state.sqlite3"),
+            "SITE_ANALYSIS_DB_PATH": os.path.join(workdir, "site_analysis.sqlite3"),
+            "INGEST_JOBS_DB_PATH": os.path.join(workdir, "ingest_jobs.sqlite3"),
+            "INGEST_UPLOAD_DIR": os.path.join(workdir, "uploads"),
+            "CRAWL_PAGE_LIMIT": str(args.pages),
+            "SEMANTIC_CACHE_ENABLED": "true" if args.semantic_cache else "false",
+            "WARMUP_ON_STARTUP": "false",
+            # No notification mail for unanswered benchmark questions.
+            "EMAIL_USERNAME": "",
+            "EMAIL_RECIPIENT": "",
+        }
+    )
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def at(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": 1000 * sum(ordered) / len(ordered),
+        "p50_ms": 1000 * at(0.50),
+        "p90_ms": 1000 * at(0.90),
+        "p99_ms": 1000 * at(0.99),
+        "max_ms": 1000 * ordered[-1],
+    }
+
+
+def _peak_rss_mib() -> Dict[str, float]:
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    scale = 1 / (1024 * 1024) if sys.platform == "darwin" else 1 / 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
+
+
+def _timed(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return "unknown"
+
+
+def main() -> None:
+    args = _parse_args()
+    workdir = args.workdir or tempfile.mkdtemp(prefix="supportai-bench-")
+    _isolate(workdir, args)
+
+    from qdrant_client import QdrantClient
+
+    from app import config
+    from app.main import app
+    from app.services.qa import (
+        QA_TEMPERATURE,
+        answer_question,
+        make_rag_messages,
+        prepare_query,
+        search_chunks,
+    )
+    from app.services.reranker import LOCAL_RERANKERS
+    from app.services.resources import (
+        get_embeddings,
+        get_ingestion_graph,
+        get_llm,
+        get_qdrant_client,
+        override_resource,
+    )
+    from app.services.storage import get_collection_name
+    from app.services.tenancy import physical_collection, tenant_filter
+
+    from benchmarks.fakes import AsyncQdrantAdapter, FakeChatModel, FakeFirecrawl, LockedQdrantClient
+    from benchmarks.fixtures import make_pdfs, make_sites
+
+    sites, site_questions = make_sites(args.sites, args.pages, args.seed)
+    pdf_paths, pdf_questions = make_pdfs(os.path.join(workdir, "pdfs"), args.pdfs, args.pdf_pages, args.seed)
+
+    qdrant = LockedQdrantClient(
+        QdrantClient(path=args.qdrant_path) if args.qdrant_path else QdrantClient(location=":memory:")
+    )
+    override_resource("qdrant", qdrant)
+    override_resource("async_qdrant", AsyncQdrantAdapter(qdrant))
+    llm = FakeChatModel(latency=args.llm_latency, token_latency=args.token_latency)
+    for temperature in {QA_TEMPERATURE, config.LLM_TEMPERATURE}:
+        override_resource(f"llm:{temperature}", llm)
+    override_resource("firecrawl", FakeFirecrawl(sites, latency=args.scrape_latency))
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": vars(args),
+            "config": {
+                key: getattr(config, key)
+                for key in (
+                    "EMBEDDING_MODEL", "EMBEDDING_BACKEND", "EMBEDDING_BATCH_SIZE", "EMBEDDING_PROCESSES",
+                    "RETRIEVAL_MODE", "RERANKER", "QDRANT_COLLECTION_PROFILE", "QDRANT_SHARED_COLLECTION",
+                    "CONTEXT_TOKEN_BUDGET", "LLM_MAX_CONCURRENCY",
+                )
+            },
+        }
+    }
+
+    _, model_load = _timed(lambda: get_embeddings().embed_query("warm up"))
+    results["model_load_s"] = model_load
+
+    def count_points(collection_name: str) -> int:
+        return get_qdrant_client().count(
+            collection_name=physical_collection(collection_name),
+            count_filter=tenant_filter(collection_name),
+            exact=True,
+        ).count
+
+    def ingest(inputs: List[Dict[str, str]], collection_names: List[str]) -> Dict[str, Any]:
+        graph = get_ingestion_graph()
+        totals: List[float] = []
+        nodes: Dict[str, List[float]] = {}
+        existing = [name for name in set(collection_names) if qdrant.collection_exists(physical_collection(name))]
+        before = sum(count_points(name) for name in existing)
+        started = time.perf_counter()
+        for index, graph_input in enumerate(inputs):
+            doc_started = last = time.perf_counter()
+            for update in graph.stream(
+                {"input_url": "", "pdf_path": "", **graph_input},
+                config={"configurable": {"thread_id": f"bench-{index}"}},
+                stream_mode="updates",
+            ):
+                now = time.perf_counter()
+                for node in update:
+                    nodes.setdefault(node, []).append(now - last)
+                last = now
+            totals.append(time.perf_counter() - doc_started)
+        elapsed = time.perf_counter() - started
+        chunks = sum(count_points(name) for name in set(collection_names)) - before
+        return {
+            "documents": len(inputs),
+            "chunks_stored": chunks,
+            "seconds": elapsed,
+            "chunks_per_sec": chunks / elapsed if elapsed else 0.0,
+            "document_latency": _percentiles(totals),
+            "nodes": {node: _percentiles(values) for node, values in nodes.items()},
+        }
+
+    print("Ingesting PDFs...")
+    pdf_names = [os.path.basename(path) for path in pdf_paths]
+    results["ingest_pdf"] = ingest(
+        [{"pdf_path": path, "pdf_name": name} for path, name in zip(pdf_paths, pdf_names)],
+        [get_collection_name(pdf_name=name) for name in pdf_names],
+    )
+    print("Ingesting sites...")
+    site_inputs = [{"input_url": root} for root in sites]
+    site_collections = [get_collection_name(input_url=root) for root in sites]
+    results["ingest_url"] = ingest(site_inputs, site_collections)
+    print("Re-crawling unchanged sites...")
+    results["recrawl_url"] = ingest(site_inputs, site_collections)
+    results["peak_rss_mib_after_ingest"] = _peak_rss_mib()
+
+    rng = random.Random(args.seed)
+    questions = [(get_collection_name(input_url=root), q) for root, q in site_questions]
+    questions += [(get_collection_name(pdf_name=name), q) for name, q in pdf_questions]
+    rng.shuffle(questions)
+    sample = questions[: args.questions]
+
+    print(f"Answering {len(sample)} questions...")
+    stages: Dict[str, List[float]] = {
+        name: [] for name in ("rewrite", "embed_query", "retrieve", "rerank", "generate", "answer_question")
+    }
+    # The "llm" strategy is not a local reranker; its cost shows up as an extra LLM call.
+    reranker = LOCAL_RERANKERS.get(config.RERANKER, LOCAL_RERANKERS["none"])
+    for collection_name, question in sample:
+        query, seconds = _timed(prepare_query, question, [])
+        stages["rewrite"].append(seconds)
+        vector, seconds = _timed(get_embeddings().embed_query, query)
+        stages["embed_query"].append(seconds)
+        chunks, seconds = _timed(search_chunks, query, vector, collection_name)
+        stages["retrieve"].append(seconds)
+        chunks, seconds = _timed(reranker, query, chunks, vector)
+        stages["rerank"].append(seconds)
+        _, seconds = _timed(get_llm(QA_TEMPERATURE).invoke, make_rag_messages(question, [], chunks))
+        stages["generate"].append(seconds)
+        _, seconds = _timed(answer_question, question, [], collection_name)
+        stages["answer_question"].append(seconds)
+    results["qa"] = {stage: _percentiles(values) for stage, values in stages.items()}
+
+    print(f"Load test: {args.requests} /ask requests, concurrency {args.concurrency}...")
+    results["ask_load"] = asyncio.run(_ask_load(app, questions, args.requests, args.concurrency))
+    print(f"Batch test: {args.requests} questions via /ask/batch, {args.batch_size} per request...")
+    results["ask_batch"] = asyncio.run(_ask_batch(app, questions, args.requests, args.batch_size))
+    results["peak_rss_mib"] = _peak_rss_mib()
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as out:
+        json.dump(results, out, indent=2)
+    _print_summary(results)
+    print(f"Results written to {args.output}")
+
+
+async def _ask_load(app: Any, questions: List[Tuple[str, str]], total: int, concurrency: int) -> Dict[str, Any]:
+    import httpx
+
+    queue: "asyncio.Queue[Tuple[str, str]]" = asyncio.Queue()
+    for index in range(total):
+        queue.put_nowait(questions[index % len(questions)])
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal errors
+        while True:
+            try:
+                collection_name, question = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            response = await client.post(
+                "/api/v1/ask", json={"question": question, "collection_name": collection_name}
+            )
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 200:
+                errors += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(max(concurrency, 1))))
+        elapsed = time.perf_counter() - started
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "seconds": elapsed,
+        "requests_per_sec": total / elapsed if elapsed else 0.0,
+        "latency": _percentiles(latencies),
+    }
+
+
+async def _ask_batch(app: Any, questions: List[Tuple[str, str]], total: int, batch_size: int) -> Dict[str, Any]:
+    """The same questions as the load test, sent through /ask/batch one collection at a time."""
+    import httpx
+
+    by_collection: Dict[str, List[str]] = {}
+    for index in range(total):
+        collection_name, question = questions[index % len(questions)]
+        by_collection.setdefault(collection_name, []).append(question)
+    latencies: List[float] = []
+    errors = 0
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+        started = time.perf_counter()
+        for collection_name, batch_questions in by_collection.items():
+            for start in range(0, len(batch_questions), max(batch_size, 1)):
+                batch = batch_questions[start : start + max(batch_size, 1)]
+                request_started = time.perf_counter()
+                response = await client.post(
+                    "/api/v1/ask/batch",
+                    json={"collection_name": collection_name, "questions": [{"question": q} for q in batch]},
+                )
+                latencies.append(time.perf_counter() - request_started)
+                if response.status_code != 200:
+                    errors += 1
+        elapsed = time.perf_counter() - started
+    return {
+        "questions": total,
+        "batch_size": batch_size,
+        "errors": errors,
+        "seconds": elapsed,
+        "questions_per_sec": total / elapsed if elapsed else 0.0,
+        "batch_latency": _percentiles(latencies),
+    }
+
+
+def _print_summary(results: Dict[str, Any]) -> None:
+    for stage in ("ingest_pdf", "ingest_url", "recrawl_url"):
+        r = results[stage]
+        print(
+            f"{stage:<12} {r['documents']} docs, {r['chunks_stored']} chunks in {r['seconds']:.2f}s "
+            f"({r['chunks_per_sec']:.1f} chunks/s), p50 {r['document_latency'].get('p50_ms', 0):.0f} ms"
+        )
+    for stage, p in results["qa"].items():
+        print(f"qa.{stage:<16} p50 {p.get('p50_ms', 0):8.1f} ms  p90 {p.get('p90_ms', 0):8.1f} ms  p99 {p.get('p99_ms', 0):8.1f} ms")
+    load = results["ask_load"]
+    print(
+        f"ask_load     {load['requests_per_sec']:.1f} req/s, p50 {load['latency'].get('p50_ms', 0):.0f} ms, "
+        f"p99 {load['latency'].get('p99_ms', 0):.0f} ms, {load['errors']} errors"
+    )
+    batch = results["ask_batch"]
+    print(
+        f"ask_batch    {batch['questions_per_sec']:.1f} questions/s in batches of {batch['batch_size']}, "
+        f"{batch['errors']} errors"
+    )
+    rss = results["peak_rss_mib"]
+    print(f"peak RSS     {rss['self']:.0f} MiB (children {rss['children']:.0f} MiB)")
+
+
+if __name__ == "__main__":
+    main()